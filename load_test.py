@@ -0,0 +1,283 @@
+r"""
+Нагрузочный тест YaNews и YaNote на локальных серверах.
+
+Подготовка, в каталогах ya_news и ya_note:
+    python manage.py seed_news
+    python manage.py seed_notes
+    python manage.py runserver 8000  # ya_news
+    python manage.py runserver 8001  # ya_note
+
+Запуск:
+    python load_test.py --news-url http://127.0.0.1:8000 \
+        --notes-url http://127.0.0.1:8001 --users 10 --duration 30
+
+Каждый виртуальный пользователь входит под своим именем из seed_*
+(load1, load2, ...) и выполняет случайные действия с весами из
+SCENARIO. Итог печатается в JSON: число запросов и ошибок,
+запросов в секунду и p50/p95/p99 в миллисекундах по каждой странице.
+"""
+import argparse
+import itertools
+import json
+import random
+import re
+import statistics
+import threading
+import time
+from collections import defaultdict
+from http.client import HTTPException
+from http.cookiejar import CookieJar
+from urllib.error import HTTPError, URLError
+from urllib.parse import urlencode
+from urllib.request import (
+    HTTPCookieProcessor,
+    HTTPRedirectHandler,
+    build_opener,
+)
+
+# Страница и её вес в смеси запросов: чтения заметно больше, чем записи.
+SCENARIO = {
+    'news:home': 30,
+    'news:detail': 30,
+    'news:comment': 5,
+    'notes:list': 20,
+    'notes:add': 5,
+    'notes:edit': 10,
+}
+NEWS_LINK = re.compile(r'href="/news/(\d+)/"')
+NOTE_LINK = re.compile(r'href="/note/([\w-]+)/"')
+# Доля просмотров свежих новостей с главной, остальное — длинный хвост.
+HOT_SHARE = 0.9
+
+
+class NoRedirect(HTTPRedirectHandler):
+    """Редирект после POST считается ответом, а не новым запросом."""
+
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+
+class Site:
+    """Сессия одного пользователя на одном сайте: cookie и CSRF."""
+
+    def __init__(self, base_url, timeout):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.cookies = CookieJar()
+        self.opener = build_opener(
+            HTTPCookieProcessor(self.cookies), NoRedirect
+        )
+
+    def csrf_token(self):
+        for cookie in self.cookies:
+            if cookie.name == 'csrftoken':
+                return cookie.value
+        return ''
+
+    def request(self, path, data=None):
+        """
+        Возвращает код ответа и тело; редирект — тоже успешный ответ.
+
+        Если сервер не ответил — отказ в соединении, обрыв, таймаут, —
+        код равен None: это ошибка запроса, а не повод остановить поток.
+        """
+        body = None
+        if data is not None:
+            body = urlencode(
+                {**data, 'csrfmiddlewaretoken': self.csrf_token()}
+            ).encode()
+        try:
+            with self.opener.open(
+                self.base_url + path, body, self.timeout
+            ) as response:
+                return response.status, response.read().decode()
+        except HTTPError as error:
+            return error.code, ''
+        except (URLError, OSError, HTTPException):
+            return None, ''
+
+    def login(self, username, password):
+        self.request('/auth/login/')
+        status, _ = self.request(
+            '/auth/login/', {'username': username, 'password': password}
+        )
+        if status is None:
+            raise URLError(f'{self.base_url} не отвечает')
+        if status != 302:
+            raise RuntimeError(f'{self.base_url}: {username} не вошёл.')
+
+
+class Results:
+    """Задержки и ошибки по страницам, общие для всех потоков."""
+
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.lock = threading.Lock()
+
+    def add(self, name, elapsed, ok):
+        with self.lock:
+            self.latencies[name].append(elapsed)
+            if not ok:
+                self.errors[name] += 1
+
+    def report(self, duration):
+        endpoints = {}
+        for name in SCENARIO:
+            latencies = self.latencies.get(name)
+            if not latencies:
+                continue
+            if len(latencies) > 1:
+                quantiles = statistics.quantiles(latencies, n=100)
+            else:
+                quantiles = latencies * 99
+            endpoints[name] = {
+                'requests': len(latencies),
+                'errors': self.errors[name],
+                'throughput_rps': round(len(latencies) / duration, 2),
+                'p50_ms': round(quantiles[49] * 1000, 2),
+                'p95_ms': round(quantiles[94] * 1000, 2),
+                'p99_ms': round(quantiles[98] * 1000, 2),
+            }
+        total = sum(len(values) for values in self.latencies.values())
+        return {
+            'duration_s': round(duration, 2),
+            'requests': total,
+            'throughput_rps': round(total / duration, 2),
+            'endpoints': endpoints,
+        }
+
+
+class VirtualUser:
+    """Пользователь, который читает новости и ведёт заметки."""
+
+    def __init__(self, number, args, results):
+        self.rng = random.Random(args.seed + number)
+        self.news = Site(args.news_url, args.timeout)
+        self.notes = Site(args.notes_url, args.timeout)
+        username = f'{args.prefix}{number}'
+        self.news.login(username, args.password)
+        self.notes.login(username, args.password)
+        self.results = results
+        self.hot_news = []
+        self.news_count = args.news
+        self.own_slugs = []
+        self.counter = itertools.count()
+
+    def timed(self, name, site, path, data=None, expected=(200,)):
+        started = time.perf_counter()
+        status, body = site.request(path, data)
+        self.results.add(
+            name, time.perf_counter() - started, status in expected
+        )
+        return body
+
+    def pick_news(self):
+        if self.hot_news and self.rng.random() < HOT_SHARE:
+            # Верх главной смотрят чаще, чем её низ.
+            weights = [1 / rank for rank in range(1, len(self.hot_news) + 1)]
+            return self.rng.choices(self.hot_news, weights)[0]
+        return self.rng.randint(1, self.news_count)
+
+    def news_home(self):
+        body = self.timed('news:home', self.news, '/')
+        self.hot_news = [int(pk) for pk in NEWS_LINK.findall(body)] or (
+            self.hot_news
+        )
+
+    def news_detail(self):
+        self.timed(
+            'news:detail', self.news, f'/news/{self.pick_news()}/',
+            expected=(200, 404)
+        )
+
+    def news_comment(self):
+        self.timed(
+            'news:comment', self.news, f'/news/{self.pick_news()}/',
+            {'text': 'Комментарий под нагрузкой.'}, expected=(302, 404)
+        )
+
+    def notes_list(self):
+        body = self.timed('notes:list', self.notes, '/notes/')
+        self.own_slugs = NOTE_LINK.findall(body)
+
+    def notes_add(self):
+        self.timed('notes:add', self.notes, '/add/', {
+            'title': f'Нагрузка {next(self.counter)}',
+            'text': 'Заметка под нагрузкой.',
+            'slug': '',
+        }, expected=(302,))
+
+    def notes_edit(self):
+        if not self.own_slugs:
+            self.notes_list()
+            if not self.own_slugs:
+                return
+        slug = self.rng.choice(self.own_slugs)
+        self.timed('notes:edit', self.notes, f'/edit/{slug}/', {
+            'title': f'Правка {next(self.counter)}',
+            'text': 'Заметка после правки.',
+            'slug': slug,
+        }, expected=(302,))
+
+    def run(self, deadline):
+        actions = {
+            'news:home': self.news_home,
+            'news:detail': self.news_detail,
+            'news:comment': self.news_comment,
+            'notes:list': self.notes_list,
+            'notes:add': self.notes_add,
+            'notes:edit': self.notes_edit,
+        }
+        names, weights = list(SCENARIO), list(SCENARIO.values())
+        while time.monotonic() < deadline:
+            actions[self.rng.choices(names, weights)[0]]()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--news-url', default='http://127.0.0.1:8000')
+    parser.add_argument('--notes-url', default='http://127.0.0.1:8001')
+    parser.add_argument('--users', type=int, default=10)
+    parser.add_argument('--duration', type=float, default=30,
+                        help='Длительность теста в секундах.')
+    parser.add_argument('--timeout', type=float, default=10,
+                        help='Таймаут одного запроса в секундах.')
+    parser.add_argument('--news', type=int, default=1000,
+                        help='Сколько новостей создал seed_news.')
+    parser.add_argument('--prefix', default='load')
+    parser.add_argument('--password', default='load-password')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='Файл для JSON, иначе stdout.')
+    args = parser.parse_args()
+    results = Results()
+    try:
+        users = [
+            VirtualUser(number, args, results)
+            for number in range(1, args.users + 1)
+        ]
+    except URLError as error:
+        parser.exit(1, f'Сервер недоступен: {error.reason}\n')
+    started = time.monotonic()
+    deadline = started + args.duration
+    threads = [
+        threading.Thread(target=user.run, args=(deadline,))
+        for user in users
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    report = json.dumps(
+        results.report(time.monotonic() - started),
+        ensure_ascii=False, indent=2
+    )
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            file.write(report + '\n')
+    else:
+        print(report)
+
+
+if __name__ == '__main__':
+    main()
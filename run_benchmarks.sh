@@ -0,0 +1,39 @@
+#!/bin/bash
+# Замеры горячих путей обоих проектов на pytest-benchmark.
+#
+#   ./run_benchmarks.sh save     сохранить текущие результаты как базу;
+#   ./run_benchmarks.sh          сравнить с базой и упасть, если среднее
+#                                время любого замера выросло больше,
+#                                чем на BENCHMARK_THRESHOLD процентов
+#                                (целое число, по умолчанию 15).
+#
+# База хранится в <проект>/.benchmarks и зависит от машины, поэтому
+# в репозиторий не попадает: сохраните её до изменений и сравните после.
+
+THRESHOLD="${BENCHMARK_THRESHOLD:-15}"
+MODE="${1:-compare}"
+
+run_project () {
+    local project=$1
+    local settings=$2
+    local storage="file://$(pwd)/$project/.benchmarks"
+    cd "$project" || return 1
+    export DJANGO_SETTINGS_MODULE=$settings
+    if [[ "$MODE" == "save" ]]; then
+        rm -rf .benchmarks
+        pytest benchmarks --benchmark-storage="$storage" \
+            --benchmark-save=baseline
+    elif ls .benchmarks/*/0001_baseline.json >/dev/null 2>&1; then
+        pytest benchmarks --benchmark-storage="$storage" \
+            --benchmark-compare=0001 \
+            --benchmark-compare-fail="mean:$THRESHOLD%"
+    else
+        echo "Нет базы для $project: сначала ./run_benchmarks.sh save" 1>&2
+        return 1
+    fi
+    local status=$?
+    cd ..
+    return $status
+}
+
+run_project ya_news yanews.settings && run_project ya_note yanote.settings
@@ -14,6 +14,53 @@ print_message () {
     echo -e "${left_filler_len// /$symbol}$message${right_filler_len// /$symbol}\033[0m"
 }
 
+PYTEST_ARGS="--tb=line"
+if [[ "$1" == "--parallel" ]]; then
+    # Проекты идут одновременно, каждый делится между ядрами (pytest-xdist).
+    # Мигрированные тестовые базы переиспользуются между запусками,
+    # пересоздать их: ./run_tests.sh --parallel --create-db.
+    # Самые медленные setup в отчёте о длительности — это фикстуры.
+    shift
+    PARALLEL=1
+    PYTEST_ARGS="$PYTEST_ARGS -n ${TEST_WORKERS:-auto} --reuse-db --durations=${TEST_DURATIONS:-15} $*"
+fi
+
+run_project_tests () {
+    # Тесты одного проекта в его каталоге; вывод — в файл из третьего аргумента.
+    local project=$1
+    local settings=$2
+    (
+        cd "$project" &&
+        DJANGO_SETTINGS_MODULE=$settings TEST_SQLITE_NAME="$(pwd)/.test_db" \
+            pytest $PYTEST_ARGS
+    ) > "$3" 2>&1
+}
+
+run_parallel () {
+    local news_log=$(mktemp)
+    local note_log=$(mktemp)
+    run_project_tests ya_news yanews.settings "$news_log" &
+    local news_pid=$!
+    run_project_tests ya_note yanote.settings "$note_log" &
+    local note_pid=$!
+    wait $news_pid
+    local news_status=$?
+    wait $note_pid
+    local note_status=$?
+    cat "$news_log" "$note_log" 1>&2
+    rm -f "$news_log" "$note_log"
+    if [[ $news_status -ne 0 ]]; then
+        print_message " При запуске упали ваши тесты для проекта YaNews. Проверьте тесты этого проекта " "=" 1
+        echo \`\`\` 1>&2
+        return $news_status
+    fi
+    if [[ $note_status -ne 0 ]]; then
+        print_message " При запуске упали ваши тесты для проекта YaNote. Проверьте тесты этого проекта " "=" 1
+        echo \`\`\` 1>&2
+        return $note_status
+    fi
+}
+
 
 if python -m flake8 --config=setup.cfg 1>&2;
 then
@@ -21,6 +68,10 @@ then
     echo $LF 1>&2
     if python structure_test.py
     then
+        if [[ -n "$PARALLEL" ]]; then
+            run_parallel
+            exit $?
+        fi
         cd ya_news
         export DJANGO_SETTINGS_MODULE="${DJANGO_SETTINGS_MODULE:="yanews.settings"}"
         if pytest --tb=line 1>&2;
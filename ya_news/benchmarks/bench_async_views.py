@@ -0,0 +1,177 @@
+"""
+Страницы чтения под ASGI-сервером: синхронные и асинхронные представления.
+
+Запуск из каталога ya_news (нужен uvicorn):
+    python -m benchmarks.bench_async_views [--concurrency 32]
+        [--requests 2000] [--db-latency 0 5]
+
+Для каждого режима поднимается uvicorn с ASYNC_VIEWS выключенным и
+включённым, клиенты параллельно запрашивают главную и страницы новостей.
+--db-latency добавляет задержку в миллисекундах к каждому запросу
+к базе, как у базы на другом сервере. Печатаются запросы в секунду
+и p50/p99 времени ответа.
+"""
+import argparse
+import http.client
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yanews.settings')
+
+NEWS_COUNT = 20
+COMMENTS_PER_NEWS = 20
+MODES = {'синхронные': '', 'асинхронные': '1'}
+
+
+def serve(port, db_latency):
+    import django
+    import uvicorn
+    from django.db.backends.signals import connection_created
+
+    django.setup()
+
+    def delay(execute, sql, params, many, context):
+        time.sleep(db_latency / 1000)
+        return execute(sql, params, many, context)
+
+    def add_delay(connection, **kwargs):
+        connection.execute_wrappers.append(delay)
+
+    if db_latency:
+        connection_created.connect(add_delay)
+    from yanews.asgi import application
+    uvicorn.run(application, port=port, log_level='warning')
+
+
+def prepare_database():
+    import django
+    from django.core.management import call_command
+
+    django.setup()
+    from django.contrib.auth import get_user_model
+    from django.db import connection
+
+    from news.models import Comment, News
+
+    call_command('migrate', verbosity=0)
+    author = get_user_model().objects.create(username='bench')
+    News.objects.bulk_create(
+        News(title=f'Новость {index}', text='Текст.')
+        for index in range(NEWS_COUNT)
+    )
+    news_list = list(News.objects.order_by('pk'))
+    Comment.objects.bulk_create(
+        Comment(news=news, author=author, text=f'Комментарий {index}')
+        for news in news_list
+        for index in range(COMMENTS_PER_NEWS)
+    )
+    News.objects.rebuild_comment_counters()
+    connection.close()
+    return ['/'] + [f'/news/{news.pk}/' for news in news_list]
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def wait_for(port, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(('127.0.0.1', port), 0.1).close()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError('Сервер не запустился.')
+
+
+def load(port, urls, concurrency, requests):
+    latencies = []
+
+    def client(count, offset):
+        connection = http.client.HTTPConnection('127.0.0.1', port)
+        for index in range(count):
+            started = time.perf_counter()
+            connection.request('GET', urls[(offset + index) % len(urls)])
+            response = connection.getresponse()
+            response.read()
+            if response.status != 200:
+                raise RuntimeError(f'Ответ {response.status}.')
+            latencies.append(time.perf_counter() - started)
+        connection.close()
+
+    per_client = requests // concurrency
+    clients = [
+        threading.Thread(target=client, args=(per_client, offset))
+        for offset in range(concurrency)
+    ]
+    started = time.perf_counter()
+    for thread in clients:
+        thread.start()
+    for thread in clients:
+        thread.join()
+    return time.perf_counter() - started, latencies
+
+
+def run(mode, database, urls, db_latency, args):
+    port = free_port()
+    env = dict(
+        os.environ, ASYNC_VIEWS=MODES[mode], SQLITE_NAME=database,
+        CONN_MAX_AGE='60',
+    )
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'benchmarks.bench_async_views', 'serve',
+         '--port', str(port), '--db-latency', str(db_latency)],
+        env=env,
+    )
+    try:
+        wait_for(port)
+        load(port, urls, args.concurrency, args.concurrency)
+        elapsed, latencies = load(
+            port, urls, args.concurrency, args.requests
+        )
+    finally:
+        server.terminate()
+        server.wait()
+    quantiles = statistics.quantiles(latencies, n=100)
+    print(
+        f'{db_latency:>6} {mode:>12} {len(latencies) / elapsed:>11.0f} '
+        f'{quantiles[49] * 1000:>8.1f} {quantiles[98] * 1000:>8.1f}'
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('command', nargs='?', default='bench')
+    parser.add_argument('--port', type=int)
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument(
+        '--db-latency', type=float, nargs='+', default=[0, 5]
+    )
+    args = parser.parse_args()
+    if args.command == 'serve':
+        serve(args.port, args.db_latency[0])
+        return
+    with tempfile.TemporaryDirectory() as temp_dir:
+        database = str(Path(temp_dir) / 'bench.sqlite3')
+        os.environ['SQLITE_NAME'] = database
+        urls = prepare_database()
+        print(f'{"БД, мс":>6} {"режим":>12} {"запросов/с":>11} '
+              f'{"p50, мс":>8} {"p99, мс":>8}')
+        for db_latency in args.db_latency:
+            for mode in MODES:
+                run(mode, database, urls, db_latency, args)
+
+
+if __name__ == '__main__':
+    main()
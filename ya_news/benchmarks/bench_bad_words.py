@@ -0,0 +1,57 @@
+"""
+Сравнение поиска запрещённых слов: цикл по словам и BadWordsMatcher.
+
+Запуск из каталога ya_news:
+    python -m benchmarks.bench_bad_words
+"""
+import random
+import timeit
+
+from news.profanity import BadWordsMatcher, normalize
+
+ALPHABET = 'абвгдеёжзийклмнопрстуфхцчшщъыьэюя'
+WORD_COUNTS = (10, 1000, 5000)
+TEXT_LENGTHS = (1000, 10000)
+REPEAT = 5
+
+
+def random_word(rng, min_length=4, max_length=12):
+    return ''.join(
+        rng.choice(ALPHABET)
+        for _ in range(rng.randint(min_length, max_length))
+    )
+
+
+def loop_search(words, text):
+    """Прежняя реализация: по проходу текста на каждое слово."""
+    lowered_text = text.lower()
+    for word in words:
+        if word in lowered_text:
+            return word
+    return None
+
+
+def best_of(func):
+    return min(timeit.repeat(func, number=1, repeat=REPEAT))
+
+
+def main():
+    rng = random.Random(0)
+    print(f'{"слов":>6} {"символов":>9} {"цикл, мс":>10} {"матчер, мс":>11}')
+    for word_count in WORD_COUNTS:
+        words = [normalize(random_word(rng)) for _ in range(word_count)]
+        matcher = BadWordsMatcher(words)
+        for length in TEXT_LENGTHS:
+            text = ' '.join(
+                random_word(rng, 2, 8) for _ in range(length // 6)
+            )[:length]
+            loop_time = best_of(lambda: loop_search(words, text))
+            matcher_time = best_of(lambda: matcher.search(text))
+            print(
+                f'{word_count:>6} {length:>9} '
+                f'{loop_time * 1000:>10.3f} {matcher_time * 1000:>11.3f}'
+            )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,117 @@
+"""
+Поток комментариев с отложенной записью пачками и без неё.
+
+Запуск из каталога ya_news:
+    python -m benchmarks.bench_comment_writes [--threads 1 8 32]
+        [--duration 5]
+
+Каждый поток — отдельный вошедший пользователь, который без пауз
+отправляет комментарии к одной новости через представление, как при
+наплыве комментариев во время трансляции. База — файл SQLite
+с настройками проекта. Для каждого режима и числа потоков печатаются
+комментариев в секунду, p50/p99 задержки POST и средний размер пачки.
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+TEMP_DIR = tempfile.TemporaryDirectory()
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yanews.settings')
+os.environ['SQLITE_NAME'] = str(Path(TEMP_DIR.name) / 'bench.sqlite3')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.contrib.auth import get_user_model  # noqa: E402
+from django.core.management import call_command  # noqa: E402
+from django.test import Client, override_settings  # noqa: E402
+from django.urls import reverse  # noqa: E402
+
+from news import writebehind  # noqa: E402
+from news.models import Comment, News  # noqa: E402
+
+MODES = {'сразу': False, 'пачками': True}
+
+
+class BatchSizes:
+    """Считает размеры пачек, которые записал фоновый поток."""
+
+    def __init__(self):
+        self.sizes = []
+        self.save_comments = writebehind.save_comments
+
+    def __call__(self, comments):
+        self.sizes.append(len(comments))
+        return self.save_comments(comments)
+
+
+def commenter(client, url, deadline, latencies):
+    while time.monotonic() < deadline:
+        started = time.perf_counter()
+        response = client.post(url, {'text': 'Комментарий с трансляции'})
+        assert response.status_code == 302, response.status_code
+        latencies.append(time.perf_counter() - started)
+
+
+def run(mode, clients, url, duration):
+    latencies = []
+    batches = BatchSizes()
+    writebehind.save_comments = batches
+    deadline = time.monotonic() + duration
+    threads = [
+        threading.Thread(
+            target=commenter, args=(client, url, deadline, latencies)
+        )
+        for client in clients
+    ]
+    started = time.perf_counter()
+    with override_settings(COMMENT_WRITE_BEHIND=MODES[mode]):
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    elapsed = time.perf_counter() - started
+    writebehind.save_comments = batches.save_comments
+    quantiles = statistics.quantiles(latencies, n=100)
+    batch = statistics.mean(batches.sizes) if batches.sizes else 1
+    print(
+        f'{mode:>8} {len(clients):>7} {len(latencies) / elapsed:>14.0f} '
+        f'{quantiles[49] * 1000:>8.1f} {quantiles[98] * 1000:>8.1f} '
+        f'{batch:>6.1f}'
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--threads', type=int, nargs='+', default=(1, 8, 32))
+    parser.add_argument('--duration', type=float, default=5,
+                        help='Секунд на каждый замер.')
+    args = parser.parse_args()
+    call_command('migrate', verbosity=0)
+    news = News.objects.create(title='Трансляция', text='Текст')
+    url = reverse('news:detail', args=(news.pk,))
+    User = get_user_model()
+    clients = []
+    for index in range(max(args.threads)):
+        client = Client(HTTP_HOST='localhost')
+        client.force_login(User.objects.create(username=f'bench{index}'))
+        clients.append(client)
+    print(f'{"режим":>8} {"потоков":>7} {"комментариев/с":>14} '
+          f'{"p50, мс":>8} {"p99, мс":>8} {"пачка":>6}')
+    try:
+        for threads in args.threads:
+            for mode in MODES:
+                run(mode, clients[:threads], url, args.duration)
+        news.refresh_from_db()
+        assert news.comment_count == Comment.objects.count()
+    finally:
+        TEMP_DIR.cleanup()
+
+
+if __name__ == '__main__':
+    main()
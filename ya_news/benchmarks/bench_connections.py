@@ -0,0 +1,147 @@
+"""
+Пропускная способность главной страницы при разных режимах соединений.
+
+Запуск из каталога ya_news:
+    python -m benchmarks.bench_connections [--threads 8] [--requests 2000]
+
+WSGI-приложение вызывается напрямую из нескольких потоков, как в
+многопоточном сервере, вместе с сигналами начала и конца запроса.
+Модели сервера:
+    воркеры — постоянные потоки, как gunicorn --threads;
+    поток на запрос — новый поток на каждый запрос, как runserver.
+Для каждой комбинации печатаются запросы в секунду и число открытых
+соединений с базой.
+"""
+import argparse
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+from wsgiref.util import setup_testing_defaults
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yanews.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.core.management import call_command  # noqa: E402
+from django.core.wsgi import get_wsgi_application  # noqa: E402
+from django.db import connection, connections  # noqa: E402
+from django.db.backends.signals import connection_created  # noqa: E402
+from django.urls import reverse  # noqa: E402
+
+from news.models import News  # noqa: E402
+from yanews.sqlite_backend.base import get_pool  # noqa: E402
+
+CONFIGS = {
+    'без постоянных': {'CONN_MAX_AGE': 0, 'POOL_SIZE': 0},
+    'CONN_MAX_AGE': {'CONN_MAX_AGE': 60, 'POOL_SIZE': 0},
+    'пул': {'CONN_MAX_AGE': 0, 'POOL_SIZE': 8},
+}
+NEWS_COUNT = 100
+
+
+class OpenedConnections:
+    """Различные соединения sqlite3, на которых работали запросы."""
+
+    def __init__(self):
+        self.seen = set()
+        self.lock = threading.Lock()
+
+    def __call__(self, connection, **kwargs):
+        with self.lock:
+            self.seen.add(connection.connection)
+
+
+def make_request(application, environ):
+    response = application(dict(environ), lambda status, headers: None)
+    try:
+        for _ in response:
+            pass
+    finally:
+        response.close()
+
+
+def run_workers(application, environ, threads, requests):
+    def worker(count):
+        for _ in range(count):
+            make_request(application, environ)
+        # Поток воркера завершается только вместе с сервером.
+        connections.close_all()
+
+    per_thread = requests // threads
+    workers = [
+        threading.Thread(target=worker, args=(per_thread,))
+        for _ in range(threads)
+    ]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    return per_thread * threads
+
+
+def run_thread_per_request(application, environ, threads, requests):
+    def worker():
+        make_request(application, environ)
+        # runserver закрывает соединения при завершении потока запроса.
+        connections.close_all()
+
+    rounds = requests // threads
+    for _ in range(rounds):
+        batch = [threading.Thread(target=worker) for _ in range(threads)]
+        for thread in batch:
+            thread.start()
+        for thread in batch:
+            thread.join()
+    return rounds * threads
+
+
+SERVERS = {
+    'воркеры': run_workers,
+    'поток на запрос': run_thread_per_request,
+}
+
+
+def prepare_database(path):
+    connection.settings_dict['NAME'] = path
+    call_command('migrate', verbosity=0)
+    News.objects.bulk_create(
+        News(title=f'Новость {index}', text='Текст.')
+        for index in range(NEWS_COUNT)
+    )
+    connection.close()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--requests', type=int, default=2000)
+    args = parser.parse_args()
+    application = get_wsgi_application()
+    environ = {'PATH_INFO': reverse('news:home')}
+    setup_testing_defaults(environ)
+    opened = OpenedConnections()
+    connection_created.connect(opened)
+    with tempfile.TemporaryDirectory() as temp_dir:
+        prepare_database(str(Path(temp_dir) / 'bench.sqlite3'))
+        print(f'{"сервер":>16} {"соединения":>15} {"запросов/с":>11} '
+              f'{"соединений":>11}')
+        for server, run in SERVERS.items():
+            for name, options in CONFIGS.items():
+                connection.settings_dict.update(options)
+                opened.seen.clear()
+                started = time.perf_counter()
+                count = run(application, environ, args.threads, args.requests)
+                elapsed = time.perf_counter() - started
+                pool = get_pool(connection.settings_dict)
+                if pool is not None:
+                    pool.clear()
+                print(f'{server:>16} {name:>15} {count / elapsed:>11.0f} '
+                      f'{len(opened.seen):>11}')
+
+
+if __name__ == '__main__':
+    main()
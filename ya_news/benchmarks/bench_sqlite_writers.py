@@ -0,0 +1,102 @@
+"""
+Конкурентная запись в SQLite до и после настройки соединения.
+
+Запуск из каталога ya_news:
+    python -m benchmarks.bench_sqlite_writers [--threads 8] [--writes 200]
+
+Каждый поток, как представление с transaction.atomic(), открывает
+транзакцию, читает счётчик и пишет строку. Для каждой конфигурации
+печатаются пропускная способность, p50/p99 задержки транзакции
+и число ошибок «database is locked».
+"""
+import argparse
+import sqlite3
+import statistics
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from yanews.settings import SQLITE_PRAGMAS
+from yanews.sqlite_backend.base import apply_pragmas
+
+CONFIGS = {
+    'стандартная': ({}, 'DEFERRED'),
+    'настроенная': (SQLITE_PRAGMAS, 'IMMEDIATE'),
+}
+SCHEMA = (
+    'CREATE TABLE news (id INTEGER PRIMARY KEY, comment_count INTEGER)',
+    'CREATE TABLE comment (id INTEGER PRIMARY KEY, news_id INTEGER, '
+    'text TEXT)',
+    'INSERT INTO news (comment_count) VALUES (0)',
+)
+
+
+def writer(path, pragmas, mode, writes, latencies, errors):
+    # Django по умолчанию открывает sqlite3 с timeout=5 секунд.
+    connection = sqlite3.connect(path, timeout=5, isolation_level=None)
+    apply_pragmas(connection, pragmas)
+    for _ in range(writes):
+        started = time.perf_counter()
+        try:
+            connection.execute(f'BEGIN {mode}')
+            connection.execute('SELECT comment_count FROM news WHERE id = 1')
+            connection.execute(
+                "INSERT INTO comment (news_id, text) VALUES (1, 'текст')"
+            )
+            connection.execute(
+                'UPDATE news SET comment_count = comment_count + 1 '
+                'WHERE id = 1'
+            )
+            connection.execute('COMMIT')
+        except sqlite3.OperationalError:
+            errors.append(1)
+            if connection.in_transaction:
+                connection.execute('ROLLBACK')
+            continue
+        latencies.append(time.perf_counter() - started)
+    connection.close()
+
+
+def run(name, pragmas, mode, threads, writes):
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = str(Path(temp_dir) / 'bench.sqlite3')
+        with sqlite3.connect(path) as connection:
+            apply_pragmas(connection, pragmas)
+            for statement in SCHEMA:
+                connection.execute(statement)
+        latencies, errors = [], []
+        workers = [
+            threading.Thread(
+                target=writer,
+                args=(path, pragmas, mode, writes, latencies, errors)
+            )
+            for _ in range(threads)
+        ]
+        started = time.perf_counter()
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        elapsed = time.perf_counter() - started
+    quantiles = statistics.quantiles(latencies, n=100)
+    print(
+        f'{name:>12} {len(latencies) / elapsed:>10.0f} '
+        f'{quantiles[49] * 1000:>8.2f} {quantiles[98] * 1000:>8.2f} '
+        f'{len(errors):>7}'
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--writes', type=int, default=200)
+    args = parser.parse_args()
+    print(f'{"конфигурация":>12} {"записей/с":>10} {"p50, мс":>8} '
+          f'{"p99, мс":>8} {"ошибок":>7}')
+    for name, (pragmas, mode) in CONFIGS.items():
+        run(name, pragmas, mode, args.threads, args.writes)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,99 @@
+"""
+Отрисовка страниц с загрузчиками шаблонов без кэша и с кэшем.
+
+Запуск из каталога ya_news:
+    python -m benchmarks.bench_templates
+
+Для каждой страницы печатается время запроса и время отрисовки
+шаблонов по профилю, затем профиль страницы новости по шаблонам:
+сколько раз отрисован, сколько занял с вложенными и сколько
+запросов к БД сделал сам.
+"""
+import os
+import timeit
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yanews.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.conf import settings  # noqa: E402
+from django.contrib.auth import get_user_model  # noqa: E402
+from django.test import Client, override_settings  # noqa: E402
+from django.test.utils import (  # noqa: E402
+    setup_databases,
+    teardown_databases,
+)
+from django.urls import reverse  # noqa: E402
+
+from news.models import Comment, News  # noqa: E402
+from yanews.middleware import TemplateRenders  # noqa: E402
+
+BASE_LOADERS = [
+    'django.template.loaders.filesystem.Loader',
+    'django.template.loaders.app_directories.Loader',
+]
+LOADERS = {
+    'без кэша': BASE_LOADERS,
+    'с кэшем': [('django.template.loaders.cached.Loader', BASE_LOADERS)],
+}
+COMMENTS = 50
+REPEAT = 200
+
+
+def templates_with(loaders):
+    engine = dict(settings.TEMPLATES[0])
+    engine['OPTIONS'] = {**engine['OPTIONS'], 'loaders': loaders}
+    return [engine]
+
+
+def measure(client, url):
+    client.get(url)
+    with TemplateRenders().profile() as renders:
+        seconds = timeit.timeit(lambda: client.get(url), number=REPEAT)
+    return seconds * 1000 / REPEAT, renders
+
+
+def main():
+    # Без setup_test_environment: тестовая отрисовка копирует контекст
+    # каждого шаблона и искажает замеры.
+    old_config = setup_databases(verbosity=0, interactive=False)
+    try:
+        author = get_user_model().objects.create(username='bench')
+        news = News.objects.create(title='Новость', text='Текст.')
+        Comment.objects.bulk_create(
+            Comment(news=news, author=author, text=f'Комментарий {index}')
+            for index in range(COMMENTS)
+        )
+        client = Client(HTTP_HOST='localhost')
+        client.force_login(author)
+        urls = {
+            'news:home': reverse('news:home'),
+            'news:detail': reverse('news:detail', args=(news.pk,)),
+        }
+        print(f'{"загрузчик":>10} {"страница":>12} {"запрос, мс":>11} '
+              f'{"шаблоны, мс":>12}')
+        profiles = {}
+        for loader_name, loaders in LOADERS.items():
+            with override_settings(TEMPLATES=templates_with(loaders)):
+                for name, url in urls.items():
+                    request_ms, renders = measure(client, url)
+                    profiles[loader_name, name] = renders
+                    print(f'{loader_name:>10} {name:>12} {request_ms:>11.2f} '
+                          f'{renders.duration * 1000 / REPEAT:>12.2f}')
+        print(f'\n{"шаблон":>24} {"отрисовок":>10} {"мс":>8} '
+              f'{"запросов":>9}')
+        renders = profiles['с кэшем', 'news:detail']
+        for template, stats in sorted(
+            renders.templates.items(), key=lambda item: -item[1].duration
+        ):
+            print(f'{template:>24} {stats.renders // REPEAT:>10} '
+                  f'{stats.duration * 1000 / REPEAT:>8.2f} '
+                  f'{stats.queries / REPEAT:>9.1f}')
+    finally:
+        teardown_databases(old_config, verbosity=0)
+
+
+if __name__ == '__main__':
+    main()
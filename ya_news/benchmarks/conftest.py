@@ -0,0 +1,62 @@
+from datetime import timedelta
+
+import pytest
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test.client import Client
+from django.utils import timezone
+
+from news.models import Comment, News
+
+COMMENT_COUNTS = (10, 1000, 100000)
+BATCH_SIZE = 5000
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    """Каждый замер начинается с пустым кэшем."""
+    cache.clear()
+
+
+@pytest.fixture(scope='module', params=COMMENT_COUNTS,
+                ids=lambda count: f'{count}-comments')
+def news_feed(request, django_db_setup, django_db_blocker):
+    """
+    Свежие новости для главной, у первой из них count комментариев.
+
+    Данные создаются один раз на модуль и размер: вставка 100 тысяч
+    комментариев занимает дольше самих замеров.
+    """
+    with django_db_blocker.unblock():
+        author = get_user_model().objects.create(username='Комментатор')
+        today = timezone.now().date()
+        News.objects.bulk_create(
+            News(
+                title=f'Новость {index}',
+                text=f'Текст {index}',
+                date=today - timedelta(days=index),
+            )
+            for index in range(settings.NEWS_COUNT_ON_HOME_PAGE)
+        )
+        hot = News.objects.first()
+        Comment.objects.bulk_create(
+            (
+                Comment(news=hot, author=author, text=f'Комментарий {index}')
+                for index in range(request.param)
+            ),
+            batch_size=BATCH_SIZE,
+        )
+        News.objects.all().rebuild_comment_counters()
+    yield hot
+    with django_db_blocker.unblock():
+        News.objects.all().delete()
+        author.delete()
+
+
+@pytest.fixture
+def reader_client(django_user_model):
+    """Залогиненный читатель: ему страница новости не отдаётся из кэша."""
+    client = Client()
+    client.force_login(django_user_model.objects.create(username='Читатель'))
+    return client
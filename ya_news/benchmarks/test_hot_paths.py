@@ -0,0 +1,56 @@
+"""
+Замеры горячих путей YaNews на pytest-benchmark.
+
+Запуск и сравнение с сохранённой базой — через run_benchmarks.sh
+в корне репозитория.
+"""
+from http import HTTPStatus
+
+import pytest
+from django.core.exceptions import ValidationError
+from django.urls import reverse
+
+from news.forms import BAD_WORDS, CommentForm
+
+TEXT_LENGTHS = (1000, 100000)
+
+
+def make_text(length, tail=''):
+    """Длинный текст из безобидных слов, с tail в самом конце."""
+    words = ' '.join(f'слово{index}' for index in range(length // 6))
+    return words[:length - len(tail)] + tail
+
+
+def test_news_list(benchmark, news_feed, db, reader_client):
+    url = reverse('news:home')
+    response = benchmark(reader_client.get, url)
+    assert response.status_code == HTTPStatus.OK
+
+
+def test_news_detail(benchmark, news_feed, db, reader_client):
+    url = reverse('news:detail', args=(news_feed.pk,))
+    response = benchmark(reader_client.get, url)
+    assert response.status_code == HTTPStatus.OK
+
+
+def clean_text(text):
+    """clean_text формы, уже прошедшей проверку поля."""
+    form = CommentForm(data={'text': text})
+    form.cleaned_data = {'text': text}
+    try:
+        return form.clean_text()
+    except ValidationError:
+        return None
+
+
+@pytest.mark.parametrize('length', TEXT_LENGTHS)
+def test_clean_text_allowed(benchmark, length):
+    text = make_text(length)
+    assert benchmark(clean_text, text) == text
+
+
+@pytest.mark.parametrize('length', TEXT_LENGTHS)
+def test_clean_text_bad_word_at_end(benchmark, length):
+    """Худший случай: запрещённое слово в самом конце текста."""
+    text = make_text(length, f' {BAD_WORDS[0]}')
+    assert benchmark(clean_text, text) is None
@@ -5,3 +5,10 @@ class NewsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'news'
     verbose_name = 'Новости'
+
+    def ready(self):
+        from django.core.checks import Tags, register
+
+        from yanews.auth import check_shared_cache
+
+        register(check_shared_cache, Tags.caches, deploy=True)
@@ -0,0 +1,26 @@
+"""Версии закэшированных фрагментов страницы новости."""
+import time
+
+from django.core.cache import cache
+
+
+def _version_key(news_id):
+    return f'news:{news_id}:comments-version'
+
+
+def get_comments_version(news_id):
+    """
+    Текущая версия комментариев новости.
+
+    Начальная версия берётся от времени, чтобы после вытеснения ключа
+    из кэша не ожили фрагменты, сохранённые под старой версией.
+    """
+    return cache.get_or_set(_version_key(news_id), time.time_ns, None)
+
+
+def bump_comments_version(news_id):
+    """Инвалидирует закэшированные фрагменты новости."""
+    try:
+        cache.incr(_version_key(news_id))
+    except ValueError:
+        cache.set(_version_key(news_id), time.time_ns(), None)
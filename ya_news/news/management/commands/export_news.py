@@ -0,0 +1,30 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from news.models import News
+from news.transfer import FORMATS, detect_format, open_stream, write_records
+
+FIELDS = ('title', 'text', 'date')
+
+
+class Command(BaseCommand):
+    help = 'Выгружает новости в JSON Lines или CSV, не держа их в памяти.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="Путь к файлу или '-' для stdout.")
+        parser.add_argument('--format', choices=FORMATS)
+        parser.add_argument('--chunk-size', type=int, default=2000)
+
+    def handle(self, path, **options):
+        fmt = detect_format(path, options['format'])
+        started = time.monotonic()
+        rows = News.objects.order_by('id').values_list(*FIELDS).iterator(
+            chunk_size=options['chunk_size']
+        )
+        with open_stream(path, 'w') as file:
+            total = write_records(file, FIELDS, rows, fmt)
+        self.stderr.write(self.style.SUCCESS(
+            f'Выгружено новостей: {total} '
+            f'за {time.monotonic() - started:.1f} с'
+        ))
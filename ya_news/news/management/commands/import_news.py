@@ -0,0 +1,53 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils.dateparse import parse_date
+
+from news.models import News
+from news.transfer import (
+    FORMATS, batched, detect_format, open_stream, read_records
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Загружает новости из файла JSON Lines или CSV '
+        'с полями title, text и необязательным date.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="Путь к файлу или '-' для stdin.")
+        parser.add_argument('--format', choices=FORMATS)
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def build_news(self, number, record):
+        try:
+            news = News(title=record['title'], text=record['text'])
+        except KeyError as error:
+            raise CommandError(f'Строка {number}: нет поля {error}.')
+        if record.get('date'):
+            news.date = parse_date(str(record['date']))
+            if news.date is None:
+                raise CommandError(f'Строка {number}: неверная дата.')
+        return news
+
+    def handle(self, path, **options):
+        fmt = detect_format(path, options['format'])
+        started = time.monotonic()
+        total = 0
+        with open_stream(path, 'r') as file:
+            records = enumerate(read_records(file, fmt), start=1)
+            for batch in batched(records, options['batch_size']):
+                news = [self.build_news(*record) for record in batch]
+                with transaction.atomic():
+                    News.objects.bulk_create(news)
+                total += len(news)
+                elapsed = time.monotonic() - started
+                self.stderr.write(
+                    f'Загружено {total}, {total / elapsed:.0f} строк/с'
+                )
+        self.stdout.write(self.style.SUCCESS(
+            f'Загружено новостей: {total} '
+            f'за {time.monotonic() - started:.1f} с'
+        ))
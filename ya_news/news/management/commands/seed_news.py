@@ -0,0 +1,104 @@
+import datetime
+import random
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from news.models import Comment, News
+from news.seeding import paragraph, seed_users, sentence, zipf_choices
+from news.transfer import batched
+
+
+class Command(BaseCommand):
+    help = (
+        'Заполняет базу пользователями, новостями и комментариями '
+        'для нагрузочного тестирования. Новости с меньшим id свежее '
+        'и популярнее, комментарии и авторы распределены по Ципфу.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=100)
+        parser.add_argument('--news', type=int, default=1000)
+        parser.add_argument('--comments', type=int, default=20000)
+        parser.add_argument('--days', type=int, default=365,
+                            help='За сколько дней распределить новости.')
+        parser.add_argument('--prefix', default='load',
+                            help='Пользователи будут prefix1..prefixN.')
+        parser.add_argument('--password', default='load-password')
+        parser.add_argument('--exponent', type=float, default=1.1,
+                            help='Показатель закона Ципфа.')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def progress(self, name, total):
+        elapsed = time.monotonic() - self.started
+        self.stderr.write(
+            f'{name}: {total}, {total / elapsed:.0f} строк/с'
+        )
+
+    def insert(self, name, model, objects, batch_size):
+        total = 0
+        for batch in batched(objects, batch_size):
+            with transaction.atomic():
+                model.objects.bulk_create(batch)
+            total += len(batch)
+            self.progress(name, total)
+        return total
+
+    def generate_news(self, rng, count, days):
+        today = datetime.date.today()
+        offsets = sorted(rng.randint(0, days) for _ in range(count))
+        for offset in offsets:
+            yield News(
+                title=sentence(rng, 2, 5)[:50],
+                text=paragraph(rng, 2, 8),
+                date=today - datetime.timedelta(days=offset),
+            )
+
+    def generate_comments(self, rng, count, news_ids, user_ids, exponent):
+        news = zipf_choices(rng, news_ids, count, exponent)
+        authors = zipf_choices(rng, user_ids, count, exponent)
+        for news_id, author_id in zip(news, authors):
+            yield Comment(
+                news_id=news_id,
+                author_id=author_id,
+                text=paragraph(rng, 1, 3),
+            )
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        batch_size = options['batch_size']
+        self.started = time.monotonic()
+        user_ids = seed_users(
+            options['users'], options['prefix'], options['password'],
+            batch_size
+        )
+        last_id = News.objects.order_by('-pk').values_list(
+            'pk', flat=True
+        ).first() or 0
+        self.insert(
+            'Новости', News,
+            self.generate_news(rng, options['news'], options['days']),
+            batch_size
+        )
+        # SQLite не возвращает id из bulk_create: берём новые по порядку.
+        news_ids = list(
+            News.objects.filter(pk__gt=last_id).order_by(
+                'pk'
+            ).values_list('pk', flat=True)
+        )
+        comments = self.insert(
+            'Комментарии', Comment,
+            self.generate_comments(
+                rng, options['comments'], news_ids, user_ids,
+                options['exponent']
+            ),
+            batch_size
+        )
+        News.objects.filter(pk__gt=last_id).rebuild_comment_counters()
+        self.stdout.write(self.style.SUCCESS(
+            f'Пользователей: {len(user_ids)}, новостей: {len(news_ids)}, '
+            f'комментариев: {comments} '
+            f'за {time.monotonic() - self.started:.1f} с'
+        ))
@@ -0,0 +1,33 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from yanews.replica import copy_database
+
+
+class Command(BaseCommand):
+    help = (
+        'Копирует основную базу SQLite в реплику для чтения. '
+        'С --interval повторяет копирование, пока его не остановят.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interval', type=float, default=0,
+                            help='Пауза между копиями в секундах.')
+
+    def handle(self, *args, **options):
+        source = connections[DEFAULT_DB_ALIAS]
+        target = connections[settings.REPLICA_DATABASE]
+        while True:
+            started = time.monotonic()
+            generation = copy_database(source, target)
+            self.stdout.write(self.style.SUCCESS(
+                f'Реплика {target.settings_dict["NAME"]} обновлена '
+                f'до копии {generation} '
+                f'за {time.monotonic() - started:.2f} с'
+            ))
+            if not options['interval']:
+                break
+            time.sleep(options['interval'])
@@ -1,22 +1,88 @@
+import threading
 from datetime import datetime
 
 from django.conf import settings
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Greatest
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.utils import timezone
+
+from .caching import bump_comments_version
+
+
+class NewsQuerySet(models.QuerySet):
+
+    @staticmethod
+    def _last_comment_created():
+        return Subquery(
+            Comment.objects.filter(
+                news=OuterRef('pk')
+            ).order_by('-created').values('created')[:1]
+        )
+
+    def update_comment_counters(self, delta):
+        """
+        Сдвигает счётчик комментариев на delta.
+
+        Обновление делается F-выражением одним UPDATE,
+        поэтому параллельные запросы не теряют изменения.
+        """
+        return self.update(
+            comment_count=Greatest(F('comment_count') + delta, 0),
+            last_comment_at=self._last_comment_created(),
+        )
+
+    def rebuild_comment_counters(self):
+        """Пересчитывает счётчики по таблице комментариев."""
+        comment_count = Comment.objects.filter(
+            news=OuterRef('pk')
+        ).order_by().values('news').annotate(
+            count=Count('pk')
+        ).values('count')
+        return self.update(
+            comment_count=Coalesce(Subquery(comment_count), 0),
+            last_comment_at=self._last_comment_created(),
+        )
 
 
 class News(models.Model):
     title = models.CharField(max_length=50)
     text = models.TextField()
     date = models.DateField(default=datetime.today)
+    comment_count = models.PositiveIntegerField(
+        'Комментариев', default=0, editable=False
+    )
+    last_comment_at = models.DateTimeField(
+        'Последний комментарий', null=True, blank=True, editable=False
+    )
+    # Не auto_now: loaddata сохраняет без pre_save, и фикстуры без этого
+    # поля получают значение по умолчанию.
+    updated = models.DateTimeField(
+        'Изменена', default=timezone.now, editable=False
+    )
+
+    objects = NewsQuerySet.as_manager()
 
     class Meta:
         ordering = ('-date',)
+        indexes = (
+            models.Index(fields=('-date', 'id'), name='news_date_id_idx'),
+        )
         verbose_name_plural = 'Новости'
         verbose_name = 'Новость'
 
     def __str__(self):
         return self.title
 
+    def save(self, *args, **kwargs):
+        """Любое сохранение новости меняет версию её страниц."""
+        self.updated = timezone.now()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            kwargs['update_fields'] = {*update_fields, 'updated'}
+        super().save(*args, **kwargs)
+
 
 class Comment(models.Model):
     news = models.ForeignKey(
@@ -32,6 +98,110 @@ class Comment(models.Model):
 
     class Meta:
         ordering = ('created',)
+        indexes = (
+            models.Index(
+                fields=('news', 'created', 'id'),
+                name='comment_news_created_idx'
+            ),
+            models.Index(
+                fields=('author', 'created', 'id'),
+                name='comment_author_created_idx'
+            ),
+        )
 
     def __str__(self):
         return self.text[:50]
+
+
+def comment_saved(sender, instance, created, raw=False, **kwargs):
+    """
+    Новый комментарий сдвигает счётчики новости, правка — версию фрагментов.
+
+    Так счётчики верны при любом пути записи: в представлениях, в админке
+    и через ORM. bulk_create сигналов не шлёт, его вызывающий сдвигает
+    счётчики сам.
+    """
+    if raw:
+        return
+    if created:
+        News.objects.filter(pk=instance.news_id).update_comment_counters(1)
+    transaction.on_commit(lambda: bump_comments_version(instance.news_id))
+
+
+class CascadeDeletes(threading.local):
+    """
+    Удаляемые сейчас новости и авторы.
+
+    Каскад из них удаляет комментарии пачкой, и сдвигать счётчики
+    по одному UPDATE на каждый комментарий незачем: у удалённой новости
+    счётчиков не остаётся, а новости авторов пересчитываются разом.
+    """
+
+    def __init__(self):
+        self.news = set()
+        self.authors = set()
+        self.stale_news = set()
+
+
+cascade_deletes = CascadeDeletes()
+
+
+def bump_versions(news_ids):
+    for news_id in news_ids:
+        bump_comments_version(news_id)
+
+
+def comment_deleted(sender, instance, **kwargs):
+    """Удалённый комментарий уменьшает счётчики своей новости."""
+    if instance.news_id in cascade_deletes.news:
+        return
+    if instance.author_id in cascade_deletes.authors:
+        cascade_deletes.stale_news.add(instance.news_id)
+        return
+    News.objects.filter(pk=instance.news_id).update_comment_counters(-1)
+    transaction.on_commit(lambda: bump_comments_version(instance.news_id))
+
+
+def news_deleting(sender, instance, **kwargs):
+    cascade_deletes.news.add(instance.pk)
+
+
+def news_deleted(sender, instance, **kwargs):
+    cascade_deletes.news.discard(instance.pk)
+
+
+def author_deleting(sender, instance, **kwargs):
+    cascade_deletes.authors.add(instance.pk)
+
+
+def author_deleted(sender, instance, **kwargs):
+    """После удаления последнего автора пересчитывает задетые новости."""
+    cascade_deletes.authors.discard(instance.pk)
+    if cascade_deletes.authors or not cascade_deletes.stale_news:
+        return
+    news_ids = cascade_deletes.stale_news - cascade_deletes.news
+    cascade_deletes.stale_news = set()
+    News.objects.filter(pk__in=news_ids).rebuild_comment_counters()
+    transaction.on_commit(lambda: bump_versions(news_ids))
+
+
+post_save.connect(
+    comment_saved, sender=Comment, dispatch_uid='news.comment_saved'
+)
+post_delete.connect(
+    comment_deleted, sender=Comment, dispatch_uid='news.comment_deleted'
+)
+pre_delete.connect(
+    news_deleting, sender=News, dispatch_uid='news.news_deleting'
+)
+post_delete.connect(
+    news_deleted, sender=News, dispatch_uid='news.news_deleted'
+)
+pre_delete.connect(
+    author_deleting, sender=settings.AUTH_USER_MODEL,
+    dispatch_uid='news.author_deleting'
+)
+post_delete.connect(
+    author_deleted, sender=settings.AUTH_USER_MODEL,
+    dispatch_uid='news.author_deleted'
+)
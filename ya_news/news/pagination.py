@@ -0,0 +1,73 @@
+"""Постраничная выдача комментариев по курсору (created, id)."""
+import base64
+import binascii
+from datetime import datetime
+
+from django.conf import settings
+from django.db.models import Q
+from django.http import Http404
+from django.utils.functional import cached_property
+
+
+def encode_cursor(comment):
+    """Курсор, указывающий на позицию сразу после комментария."""
+    raw = f'{comment.created.isoformat()}|{comment.pk}'
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    padding = '=' * (-len(cursor) % 4)
+    try:
+        raw = base64.urlsafe_b64decode(cursor + padding).decode()
+        created, pk = raw.rsplit('|', 1)
+        return datetime.fromisoformat(created), int(pk)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise Http404('Некорректный курсор комментариев.')
+
+
+class CommentPage:
+    """
+    Страница комментариев новости.
+
+    Вместо OFFSET используется условие по паре (created, id),
+    поэтому стоимость запроса не зависит от глубины страницы.
+    Запрос выполняется только при первом обращении к странице.
+    """
+
+    def __init__(self, news, cursor=None, per_page=None):
+        self.news = news
+        self.cursor = cursor
+        self.after = decode_cursor(cursor) if cursor else None
+        self.per_page = per_page or settings.COMMENTS_PER_PAGE
+
+    def get_queryset(self):
+        queryset = self.news.comment_set.select_related(
+            'author'
+        ).order_by('created', 'pk')
+        if self.after:
+            created, pk = self.after
+            queryset = queryset.filter(
+                Q(created__gt=created) | Q(created=created, pk__gt=pk)
+            )
+        return queryset
+
+    @cached_property
+    def _rows(self):
+        # Лишняя строка нужна только чтобы понять, есть ли продолжение.
+        return list(self.get_queryset()[:self.per_page + 1])
+
+    @property
+    def object_list(self):
+        return self._rows[:self.per_page]
+
+    @property
+    def next_cursor(self):
+        if len(self._rows) > self.per_page:
+            return encode_cursor(self.object_list[-1])
+        return None
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
@@ -0,0 +1,135 @@
+"""Поиск запрещённых слов в тексте за один проход."""
+import logging
+import os
+import re
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+# Окончание слова из списка, которое отбрасывается до основы,
+# и сколько букв окончания допускается после основы в тексте.
+ENDING = re.compile(r'[аеиоуыэюяйь]$')
+MAX_ENDING_LENGTH = 3
+
+
+def normalize(text):
+    """Приводит текст к виду для сравнения без учёта регистра и ё."""
+    return text.casefold().replace('ё', 'е')
+
+
+def stem(word):
+    """Основа слова: без последней гласной, й или ь."""
+    return ENDING.sub('', word) if len(word) > 3 else word
+
+
+def _trie_pattern(node):
+    is_word_end = '' in node
+    branches = [
+        re.escape(char) + _trie_pattern(child)
+        for char, child in sorted(node.items()) if char
+    ]
+    if not branches:
+        return ''
+    if len(branches) == 1 and not is_word_end:
+        return branches[0]
+    group = '(?:{})'.format('|'.join(branches))
+    return f'{group}?' if is_word_end else group
+
+
+class BadWordsMatcher:
+    """
+    Находит запрещённые слова одним регулярным выражением.
+
+    Слова собираются в префиксное дерево, а оно превращается
+    в регулярное выражение, поэтому текст просматривается один раз
+    и стоимость почти не зависит от размера списка.
+
+    Слово ищется по основе с начала слова текста, после основы
+    допускается короткое окончание: «редиска» находит и «редиски»,
+    и «редиской», но не «полинегодяй» для «негодяй».
+    """
+
+    def __init__(self, words):
+        self.words = {}
+        for word in words:
+            word = word.strip()
+            if word:
+                self.words.setdefault(stem(normalize(word)), word)
+        self.regex = None
+        if self.words:
+            trie = {}
+            for word in self.words:
+                node = trie
+                for char in word:
+                    node = node.setdefault(char, {})
+                node[''] = {}
+            self.regex = re.compile(
+                rf'(?<!\w)({_trie_pattern(trie)})'
+                rf'\w{{0,{MAX_ENDING_LENGTH}}}(?!\w)'
+            )
+
+    def search(self, text):
+        """Первое найденное запрещённое слово или None."""
+        if self.regex is None:
+            return None
+        match = self.regex.search(normalize(text))
+        return self.words[match.group(1)] if match else None
+
+    def find_all(self, text):
+        """Все вхождения запрещённых слов в порядке появления."""
+        if self.regex is None:
+            return []
+        return [
+            self.words[match.group(1)]
+            for match in self.regex.finditer(normalize(text))
+        ]
+
+
+class BadWordsSource:
+    """
+    Список запрещённых слов с подгрузкой из файла.
+
+    Файл содержит по одному слову в строке, строки с # пропускаются.
+    Файл перечитывается, когда меняется время его изменения,
+    поэтому список можно обновлять без перезапуска сервера.
+    Пока файл не читается, проверка идёт по встроенному списку,
+    а в лог один раз пишется предупреждение.
+    """
+
+    def __init__(self, words):
+        self.words = tuple(words)
+        self.matcher = BadWordsMatcher(self.words)
+        self.file_matcher = None
+        self.file_state = None
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def read_file(path):
+        with open(path, encoding='utf-8') as file:
+            return tuple(
+                line for line in file
+                if line.strip() and not line.lstrip().startswith('#')
+            )
+
+    def get_matcher(self, path=None):
+        if path is None:
+            return self.matcher
+        try:
+            state = (path, os.stat(path).st_mtime_ns)
+            if state != self.file_state:
+                with self.lock:
+                    if state != self.file_state:
+                        self.file_matcher = BadWordsMatcher(
+                            self.words + self.read_file(path)
+                        )
+                        self.file_state = state
+        except (OSError, ValueError) as error:
+            if self.file_state != (path, None):
+                logger.warning(
+                    'Не удалось прочитать BAD_WORDS_FILE %s: %s. '
+                    'Используется встроенный список.', path, error
+                )
+                self.file_state = (path, None)
+            return self.matcher
+        return self.file_matcher
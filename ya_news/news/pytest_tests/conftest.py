@@ -1,51 +1,184 @@
+import copy
 from datetime import datetime, timedelta
 
 
 import pytest
 from django.test.client import Client
 from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.sessions.models import Session
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models.signals import post_migrate
 from django.utils import timezone
 from django.urls import reverse
 
 from news.models import Comment, News
 
 
+class Snapshot:
+    """
+    Общие данные набора, записанные в базу один раз за сессию.
+
+    Обычный тест идёт в транзакции и откатывается к этому состоянию.
+    Тесты с transaction=True очищают базу целиком, поэтому после
+    очистки строки снимка вставляются обратно с теми же id.
+    """
+
+    models = (get_user_model(), Session, News)
+
+    def __init__(self):
+        self.rows = {}
+        self.objects = {}
+
+    def clear(self):
+        for model in reversed(self.models):
+            model.objects.all().delete()
+
+    def capture(self, **objects):
+        self.rows = {model: list(model.objects.all()) for model in self.models}
+        self.objects = objects
+
+    def restore(self, sender, using, **kwargs):
+        """Обработчик post_migrate: flush отправляет его после очистки."""
+        if sender.name != News._meta.app_config.name or (
+            using != DEFAULT_DB_ALIAS
+        ):
+            return
+        for rows in self.rows.values():
+            for row in rows:
+                row.save_base(raw=True, force_insert=True)
+
+    def get(self, name):
+        """Копия объекта снимка: тест может менять её как угодно."""
+        return copy.deepcopy(self.objects[name])
+
+
+def logged_in_client(session_key):
+    """Клиент с готовой сессией из снимка, без записи в базу."""
+    client = Client()
+    client.cookies[settings.SESSION_COOKIE_NAME] = session_key
+    return client
+
+
+@pytest.fixture(scope='session')
+def snapshot(django_db_setup, django_db_blocker):
+    """Пользователи, их сессии и новость — один раз на весь прогон."""
+    snapshot = Snapshot()
+    with django_db_blocker.unblock():
+        # После прерванного прогона с --reuse-db в базе мог остаться
+        # прошлый снимок.
+        snapshot.clear()
+        User = get_user_model()
+        sessions = {}
+        for name, username in (
+            ('author', 'Автор'), ('not_author', 'Не автор')
+        ):
+            client = Client()
+            client.force_login(User.objects.create(username=username))
+            sessions[name] = client.session.session_key
+        snapshot.capture(
+            author=User.objects.get(username='Автор'),
+            not_author=User.objects.get(username='Не автор'),
+            news=News.objects.create(
+                title='Заголовок',
+                text='Текст заметки',
+            ),
+            sessions=sessions,
+        )
+    post_migrate.connect(snapshot.restore)
+    yield snapshot
+    post_migrate.disconnect(snapshot.restore)
+    with django_db_blocker.unblock():
+        snapshot.clear()
+
+
 @pytest.fixture
-def author(django_user_model):
+def make_news(db):
+    """Фабрика: count новостей одним запросом, по дню на каждую."""
+    def make_news(count, start=None):
+        start = start or datetime.today()
+        News.objects.bulk_create(
+            News(
+                title=f'Новость {index}',
+                text=f'текст {index}',
+                date=start - timedelta(days=index)
+            )
+            for index in range(count)
+        )
+    return make_news
+
+
+@pytest.fixture
+def make_comments(db):
+    """
+    Фабрика: count комментариев к новости, по дню между ними.
+
+    bulk_create подставляет текущее время в created, поэтому даты
+    проставляются вторым запросом по новым строкам.
+    """
+    def make_comments(news, author, count, start=None):
+        start = start or timezone.now()
+        last = Comment.objects.order_by('-pk').values_list(
+            'pk', flat=True
+        ).first() or 0
+        Comment.objects.bulk_create(
+            Comment(
+                news=news,
+                author=author,
+                text=f'Comment text number {index}'
+            )
+            for index in range(count)
+        )
+        comments = list(Comment.objects.filter(pk__gt=last).order_by('pk'))
+        for index, comment in enumerate(comments):
+            comment.created = start + timedelta(days=index)
+        Comment.objects.bulk_update(comments, ('created',))
+        return comments
+    return make_comments
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    """Каждый тест начинается с пустым кэшем."""
+    cache.clear()
+
+
+@pytest.fixture(autouse=True)
+def query_budgets(settings):
+    """Превышение бюджета запросов из QUERY_BUDGETS роняет тест."""
+    settings.QUERY_PROFILING = True
+    settings.QUERY_BUDGET_RAISE = True
+
+
+@pytest.fixture
+def author(db, snapshot):
     """Фикстура автора."""
-    return django_user_model.objects.create(username='Автор')
+    return snapshot.get('author')
 
 
 @pytest.fixture
-def not_author(django_user_model):
+def not_author(db, snapshot):
     """Фикстура пользователя."""
-    return django_user_model.objects.create(username='Не автор')
+    return snapshot.get('not_author')
 
 
 @pytest.fixture
-def author_client(author):
+def author_client(db, snapshot):
     """Фикстура залогиненного автора."""
-    client = Client()
-    client.force_login(author)
-    return client
+    return logged_in_client(snapshot.objects['sessions']['author'])
 
 
 @pytest.fixture
-def not_author_client(not_author):
+def not_author_client(db, snapshot):
     """Фикстура залогиненного юзера."""
-    client = Client()
-    client.force_login(not_author)  # Логиним обычного пользователя в клиенте.
-    return client
+    return logged_in_client(snapshot.objects['sessions']['not_author'])
 
 
 @pytest.fixture
-def news(author):
+def news(db, snapshot):
     """Фикстура новости."""
-    news = News.objects.create(  # Создаём объект заметки.
-        title='Заголовок',
-        text='Текст заметки',
-    )
-    return news
+    return snapshot.get('news')
 
 
 @pytest.fixture
@@ -60,30 +193,16 @@ def comment(news, author):
 
 
 @pytest.fixture
-def create_news(db):
+def create_news(make_news):
     """Фикстура для создания нескольких новостей."""
     News.objects.all().delete()
-    today = datetime.today()
-    for index in range(settings.NEWS_COUNT_ON_HOME_PAGE + 1):
-        News.objects.create(
-            title=f'Новость {index}',
-            text=f'текст {index}',
-            date=today - timedelta(days=index)
-        )
+    make_news(settings.NEWS_COUNT_ON_HOME_PAGE + 1)
 
 
 @pytest.fixture
-def create_comments(news, author):
+def create_comments(news, author, make_comments):
     """Фикстура для создания нескольких комментов."""
-    now = timezone.now()
-    for index in range(5):
-        comment = Comment.objects.create(
-            news=news,
-            author=author,
-            text=f'Comment text number {index}'
-        )
-        comment.created = now + timedelta(days=index)
-        comment.save()
+    make_comments(news, author, 5)
 
 
 @pytest.fixture
@@ -0,0 +1,43 @@
+import json
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.core.management.base import CommandError
+
+from news.models import News
+
+
+pytestmark = pytest.mark.django_db
+
+
+def run(command, *args, **options):
+    call_command(command, *args, stdout=StringIO(), stderr=StringIO(),
+                 **options)
+
+
+@pytest.mark.parametrize('file_name', ('news.jsonl', 'news.csv'))
+def test_export_import_round_trip(tmp_path, create_news, file_name):
+    """Тест, выгруженные новости загружаются обратно без потерь."""
+    path = tmp_path / file_name
+    fields = ('title', 'text', 'date')
+    before = list(News.objects.order_by('id').values_list(*fields))
+    run('export_news', str(path))
+    News.objects.all().delete()
+    run('import_news', str(path), batch_size=4)
+    after = list(News.objects.order_by('id').values_list(*fields))
+    assert after == before
+
+
+def test_import_reports_bad_record(tmp_path):
+    """Тест, строка без обязательного поля останавливает загрузку."""
+    path = tmp_path / 'news.jsonl'
+    path.write_text(
+        json.dumps({'title': 'Заголовок', 'text': 'текст'}) + '\n'
+        + json.dumps({'title': 'Без текста'}) + '\n',
+        encoding='utf-8'
+    )
+    before = News.objects.count()
+    with pytest.raises(CommandError, match='Строка 2'):
+        run('import_news', str(path))
+    assert News.objects.count() == before
@@ -1,9 +1,18 @@
+import asyncio
 from http import HTTPStatus
+from io import StringIO
 
 import pytest
+from asgiref.sync import async_to_sync
 from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.management import call_command
+from django.urls import reverse
 
 from news.forms import CommentForm
+from news.models import News
+from news.views import NewsDetailView, NewsList
+from yanews.asynchronous import read_view
 
 
 pytestmark = pytest.mark.django_db
@@ -56,3 +65,144 @@ def test_contains_form_user_and_anonymous(name, all_routes, news, have_form):
     # Если форма должна присутствовать, проверяем её тип
     if have_form:
         assert isinstance(response.context['form'], CommentForm)
+
+
+def test_comment_count_on_home_page(
+        client, all_routes, news, create_comments, django_assert_num_queries
+):
+    """Тест, число комментариев на главной берётся без запроса к ним."""
+    call_command('rebuild_comment_counters')
+    url = all_routes['home']
+    with django_assert_num_queries(1):
+        response = client.get(url)
+    news_on_page = response.context['object_list'][0]
+    assert news_on_page.comment_count == news.comment_set.count()
+    assert f'Комментариев: {news_on_page.comment_count}' in (
+        response.content.decode()
+    )
+
+
+def test_comments_keyset_pages(client, settings, all_routes, create_comments):
+    """Тест, комментарии отдаются страницами по курсору без пропусков."""
+    settings.COMMENTS_PER_PAGE = 2
+    url = all_routes['detail']
+    seen = []
+    cursor = ''
+    while True:
+        response = client.get(f'{url}?after={cursor}' if cursor else url)
+        page = response.context['comments']
+        seen.extend(page)
+        cursor = page.next_cursor
+        if cursor is None:
+            break
+        assert f'?after={cursor}' in response.content.decode()
+    news = response.context['news']
+    assert seen == list(news.comment_set.order_by('created', 'pk'))
+
+
+def test_comments_json_fragment(client, settings, news, create_comments):
+    """Тест, JSON-фрагмент содержит страницу и ссылку на следующую."""
+    settings.COMMENTS_PER_PAGE = 3
+    url = reverse('news:comments', args=(news.pk,))
+    first = client.get(url).json()
+    assert first['html'].count('Comment text number') == 3
+    second = client.get(first['next']).json()
+    assert second['html'].count('Comment text number') == 2
+    assert second['next'] is None
+
+
+def test_comments_bad_cursor(client, all_routes):
+    """Тест, испорченный курсор даёт 404."""
+    response = client.get(all_routes['detail'] + '?after=broken')
+    assert response.status_code == HTTPStatus.NOT_FOUND
+
+
+def test_detail_fragment_cache(
+        client, author_client, all_routes, comment, django_assert_num_queries,
+        django_capture_on_commit_callbacks
+):
+    """Тест, аноним получает фрагмент из кэша до изменения комментариев."""
+    url = all_routes['detail']
+    client.get(url)
+    with django_assert_num_queries(1):
+        response = client.get(url)
+    assert comment.text in response.content.decode()
+    # Версию фрагментов сдвигает on_commit, тест идёт в транзакции.
+    with django_capture_on_commit_callbacks(execute=True):
+        author_client.post(all_routes['edit'], data={'text': 'новый текст'})
+    response = client.get(url)
+    assert 'новый текст' in response.content.decode()
+    with django_capture_on_commit_callbacks(execute=True):
+        author_client.post(url, data={'text': 'ещё комментарий'})
+    response = client.get(url)
+    assert 'ещё комментарий' in response.content.decode()
+    with django_capture_on_commit_callbacks(execute=True):
+        author_client.post(all_routes['delete'])
+    response = client.get(url)
+    assert 'новый текст' not in response.content.decode()
+
+
+@pytest.fixture
+def search_news(db):
+    """Фикстура новостей для поиска."""
+    return [
+        News.objects.create(title='Погода', text='Завтра в Москве дождь'),
+        News.objects.create(title='Дождь в Москве', text='Зонты нарасхват'),
+        News.objects.create(title='Спорт', text='Матч перенесли'),
+    ]
+
+
+def test_search_ranks_by_bm25(client, search_news):
+    """Тест, совпадение в заголовке выше совпадения в тексте."""
+    response = client.get(reverse('news:search'), {'q': 'дожд'})
+    found = list(response.context['object_list'])
+    assert found == [search_news[1], search_news[0]]
+
+
+def test_search_is_paginated(client, settings, search_news):
+    """Тест, результаты поиска разбиты на страницы."""
+    settings.SEARCH_RESULTS_PER_PAGE = 1
+    url = reverse('news:search')
+    response = client.get(url, {'q': 'москве', 'page': 2})
+    page = response.context['page_obj']
+    assert page.paginator.count == 2
+    assert list(page) == [search_news[0]]
+    assert 'page=1' in response.content.decode()
+
+
+def test_search_follows_changes(client, search_news):
+    """Тест, индекс следует за изменением и удалением новостей."""
+    url = reverse('news:search')
+    sport = search_news[2]
+    sport.title = 'Футбол'
+    sport.save()
+    assert list(client.get(url, {'q': 'футбол'}).context['object_list']) == [
+        sport
+    ]
+    assert not client.get(url, {'q': 'спорт'}).context['object_list']
+    sport.delete()
+    assert not client.get(url, {'q': 'футбол'}).context['object_list']
+    call_command('rebuild_search_index', stdout=StringIO())
+    assert client.get(url, {'q': '"матч" OR'}).status_code == HTTPStatus.OK
+
+
+@pytest.mark.django_db(transaction=True)
+@pytest.mark.parametrize(
+    'view_class, with_pk',
+    [
+        (NewsList, False),
+        (NewsDetailView, True),
+    ]
+)
+def test_async_view_matches_sync(rf, settings, news, view_class, with_pk):
+    """Тест, асинхронный вариант отдаёт ту же страницу, что и обычный."""
+    kwargs = {'pk': news.pk} if with_pk else {}
+    settings.ASYNC_VIEWS = True
+    async_view = read_view(view_class)
+    assert asyncio.iscoroutinefunction(async_view)
+    request = rf.get('/')
+    request.user = AnonymousUser()
+    expected = view_class.as_view()(request, **kwargs).render()
+    response = async_to_sync(async_view)(request, **kwargs)
+    assert response.status_code == HTTPStatus.OK
+    assert response.content == expected.content
@@ -1,10 +1,23 @@
+import os
+import threading
 from http import HTTPStatus
+from io import StringIO
 
 import pytest
+from django.core.management import call_command
+from django.db import IntegrityError, OperationalError
+from django.urls import reverse
 from pytest_django.asserts import assertRedirects
 
-from news.models import Comment
-from news.forms import BAD_WORDS, WARNING
+from news.models import Comment, News
+from news.forms import BAD_WORDS, WARNING, CommentForm
+from news.profanity import BadWordsMatcher
+from news.writebehind import (
+    CommentWriter,
+    CommentWriteTimeout,
+    PendingComment,
+    comment_writer,
+)
 
 
 FORM_DATA = {
@@ -98,3 +111,232 @@ def test_authors_can_delete_com(author_client, all_routes):
     redirect_url = all_routes['detail'] + '#comments'
     assertRedirects(response, redirect_url)
     assert Comment.objects.count() == before_count - 1
+
+
+def test_comment_counters_follow_add_and_delete(
+        author_client, all_routes, news, comment
+):
+    """Тест, счётчики новости меняются при добавлении и удалении."""
+    author_client.post(all_routes['detail'], data=FORM_DATA)
+    news.refresh_from_db()
+    new_comment = Comment.objects.latest('created')
+    assert news.comment_count == 2
+    assert news.last_comment_at == new_comment.created
+    author_client.post(reverse('news:delete', args=(new_comment.pk,)))
+    news.refresh_from_db()
+    assert news.comment_count == 1
+    assert news.last_comment_at == comment.created
+
+
+def test_comment_counters_follow_admin(admin_client, author, news, comment):
+    """Тест, счётчики верны после правки комментариев в админке."""
+    prefix = 'comment_set'
+    response = admin_client.post(
+        reverse('admin:news_news_change', args=(news.pk,)),
+        data={
+            'title': news.title,
+            'text': news.text,
+            'date': f'{news.date:%d.%m.%Y}',
+            f'{prefix}-TOTAL_FORMS': 2,
+            f'{prefix}-INITIAL_FORMS': 1,
+            f'{prefix}-0-id': comment.pk,
+            f'{prefix}-0-news': news.pk,
+            f'{prefix}-0-author': author.pk,
+            f'{prefix}-0-text': comment.text,
+            f'{prefix}-0-DELETE': 'on',
+            f'{prefix}-1-news': news.pk,
+            f'{prefix}-1-author': author.pk,
+            f'{prefix}-1-text': 'Из админки',
+        }
+    )
+    assert response.status_code == HTTPStatus.FOUND
+    news.refresh_from_db()
+    added = Comment.objects.get(text='Из админки')
+    assert news.comment_count == 1
+    assert news.last_comment_at == added.created
+
+
+def test_rebuild_comment_counters(news, create_comments):
+    """Тест, команда пересчитывает счётчики по комментариям."""
+    call_command('rebuild_comment_counters', stdout=StringIO())
+    news.refresh_from_db()
+    assert news.comment_count == news.comment_set.count()
+    assert news.last_comment_at == news.comment_set.latest('created').created
+
+
+def test_news_cascade_skips_counters(
+        news, author, make_comments, django_assert_num_queries
+):
+    """Тест, удаление новости не обновляет счётчики по каждому комментарию."""
+    make_comments(news, author, 50)
+    # Выборка новости и комментариев и два DELETE.
+    with django_assert_num_queries(4):
+        News.objects.filter(pk=news.pk).delete()
+    assert not Comment.objects.filter(news_id=news.pk).exists()
+
+
+def test_author_cascade_recounts_in_bulk(
+        news, author, not_author, make_comments, django_assert_max_num_queries
+):
+    """Тест, удаление автора пересчитывает счётчики одним запросом."""
+    make_comments(news, author, 20)
+    kept = make_comments(news, not_author, 2)
+    with django_assert_max_num_queries(8):
+        author.delete()
+    news.refresh_from_db()
+    assert news.comment_count == len(kept)
+    assert news.last_comment_at == kept[-1].created
+
+
+@pytest.mark.parametrize(
+    'text, expected_word',
+    [
+        ('Ты РЕДИСКА!', 'редиска'),
+        ('сам негодЯЙ, редиска', 'негодяй'),
+        ('редиски растут на грядке', 'редиска'),
+        ('поймали негодяя', 'негодяй'),
+        ('редис растёт на грядке', None),
+        ('полинегодяй', None),
+    ]
+)
+def test_bad_words_matcher(text, expected_word):
+    """Тест, матчер учитывает регистр, границы слов и окончания."""
+    form = CommentForm(data={'text': text})
+    assert form.is_valid() == (expected_word is None)
+    if expected_word is not None:
+        error = form.errors.as_data()['text'][0]
+        assert error.params['word'] == expected_word
+
+
+def test_bad_words_matcher_finds_all():
+    """Тест, матчер находит все слова за один проход."""
+    matcher = BadWordsMatcher(('ёж', 'ежевика', 'лук', 'лук-порей'))
+    text = 'Ёж съел ежевику, а не лукошко, и ежедневно лук-порей, ЛУК.'
+    assert matcher.find_all(text) == ['ёж', 'ежевика', 'лук-порей', 'лук']
+
+
+def test_bad_words_file_reload(settings, tmp_path):
+    """Тест, список из файла перечитывается после изменения."""
+    words_file = tmp_path / 'bad_words.txt'
+    words_file.write_text('# модерация\nкапуста\n', encoding='utf-8')
+    settings.BAD_WORDS_FILE = str(words_file)
+    assert not CommentForm(data={'text': 'Капуста!'}).is_valid()
+    assert not CommentForm(data={'text': 'редиска'}).is_valid()
+    words_file.write_text('морковь\n', encoding='utf-8')
+    os.utime(words_file, ns=(0, 1))
+    assert CommentForm(data={'text': 'Капуста!'}).is_valid()
+    assert not CommentForm(data={'text': 'морковь'}).is_valid()
+
+
+@pytest.mark.django_db(transaction=True)
+def test_write_behind_comment_seen_after_redirect(
+        settings, author_client, news
+):
+    """Тест, отложенный комментарий виден сразу после редиректа."""
+    settings.COMMENT_WRITE_BEHIND = True
+    url = reverse('news:detail', args=(news.pk,))
+    response = author_client.post(url, data=FORM_DATA, follow=True)
+    assert response.redirect_chain == [(f'{url}#comments', HTTPStatus.FOUND)]
+    assert FORM_DATA['text'] in response.content.decode()
+    assert News.objects.get(pk=news.pk).comment_count == 1
+
+
+def test_bad_words_file_missing(settings, tmp_path, caplog):
+    """Тест, без файла проверка идёт по встроенному списку."""
+    words_file = tmp_path / 'bad_words.txt'
+    settings.BAD_WORDS_FILE = str(words_file)
+    assert not CommentForm(data={'text': 'редиска'}).is_valid()
+    assert CommentForm(data={'text': 'Капуста!'}).is_valid()
+    assert 'BAD_WORDS_FILE' in caplog.text
+    words_file.write_text('капуста\n', encoding='utf-8')
+    assert not CommentForm(data={'text': 'Капуста!'}).is_valid()
+
+
+@pytest.mark.django_db(transaction=True)
+def test_write_behind_keeps_order_per_user(author, not_author, news):
+    """Тест, комментарии каждого автора записаны в порядке отправки."""
+    def send(user):
+        for index in range(10):
+            comment_writer.submit(
+                Comment(news=news, author=user, text=f'{user.pk}-{index}')
+            )
+
+    threads = [
+        threading.Thread(target=send, args=(user,))
+        for user in (author, not_author)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    for user in (author, not_author):
+        texts = list(
+            Comment.objects.filter(author=user).order_by(
+                'created', 'pk'
+            ).values_list('text', flat=True)
+        )
+        assert texts == [f'{user.pk}-{index}' for index in range(10)]
+    assert News.objects.get(pk=news.pk).comment_count == 20
+
+
+@pytest.mark.django_db(transaction=True)
+def test_write_behind_isolates_failed_comment(author, news):
+    """Тест, ошибка одного комментария не роняет остальные в пачке."""
+    deleted = News.objects.create(title='Удалена', text='Текст')
+    batch = [
+        PendingComment(Comment(news=item, author=author, text=text))
+        for item, text in (
+            (news, 'Первый'), (deleted, 'Потерянный'), (news, 'Второй')
+        )
+    ]
+    News.objects.filter(pk=deleted.pk).delete()
+    CommentWriter().write(batch)
+    assert batch[0].error is None and batch[2].error is None
+    assert isinstance(batch[1].error, IntegrityError)
+    assert list(
+        Comment.objects.order_by('pk').values_list('text', flat=True)
+    ) == ['Первый', 'Второй']
+    assert News.objects.get(pk=news.pk).comment_count == 2
+
+
+@pytest.mark.django_db(transaction=True)
+def test_write_behind_survives_writer_failure(monkeypatch, author, news):
+    """Тест, ошибка вне записи пачки доходит до запроса, поток живёт."""
+    def fail():
+        monkeypatch.undo()
+        raise OperationalError('database is locked')
+
+    monkeypatch.setattr('news.writebehind.close_old_connections', fail)
+    writer = CommentWriter()
+    with pytest.raises(OperationalError):
+        writer.submit(Comment(news=news, author=author, text='Первый'))
+    writer.submit(Comment(news=news, author=author, text='Второй'))
+    assert list(Comment.objects.values_list('text', flat=True)) == ['Второй']
+
+
+@pytest.mark.django_db(transaction=True)
+def test_write_behind_timeout(settings, monkeypatch, author, news):
+    """Тест, запрос не ждёт зависший поток дольше тайм-аута."""
+    settings.COMMENT_WRITE_BEHIND_TIMEOUT = 0.1
+    release = threading.Event()
+    monkeypatch.setattr(
+        'news.writebehind.close_old_connections', release.wait
+    )
+    writer = CommentWriter()
+    with pytest.raises(CommentWriteTimeout):
+        writer.submit(Comment(news=news, author=author, text='Брошенный'))
+    release.set()
+    writer.submit(Comment(news=news, author=author, text='Следующий'))
+    assert list(
+        Comment.objects.values_list('text', flat=True)
+    ) == ['Следующий']
+
+
+def test_write_behind_batch_size(settings, news, author):
+    """Тест, поток забирает накопившееся, но не больше размера пачки."""
+    settings.COMMENT_WRITE_BEHIND_BATCH_SIZE = 2
+    writer = CommentWriter()
+    for _ in range(3):
+        writer.queue.put(PendingComment(Comment(news=news, author=author)))
+    assert len(writer.take_batch()) == 2
+    assert len(writer.take_batch()) == 1
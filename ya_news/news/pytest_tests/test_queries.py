@@ -0,0 +1,418 @@
+import asyncio
+import logging
+import sqlite3
+from http import HTTPStatus
+from io import StringIO
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ImproperlyConfigured, MiddlewareNotUsed
+from django.core.management import call_command
+from django.db import DEFAULT_DB_ALIAS, connection, router
+from django.http import HttpResponse
+from django.template import Context, Template
+from django.test import RequestFactory
+from django.urls import reverse
+
+from pytest_lazyfixture import lazy_fixture as lf
+
+from news.models import News
+from news.pagination import CommentPage
+from news.views import CommentUpdate, NewsList
+from yanews.auth import check_shared_cache
+from yanews.middleware import (
+    QueryBudgetExceeded,
+    RequestQueries,
+    TemplateRenders,
+)
+from yanews.replica import PIN_COOKIE, ReplicaMiddleware, read_database
+from yanews.sqlite_backend.base import (
+    DatabaseWrapper,
+    apply_pragmas,
+    get_pool,
+)
+
+
+pytestmark = pytest.mark.django_db
+
+CLIENT = lf('client')
+AUTHOR_CLIENT = lf('author_client')
+REPLICA_DB = pytest.mark.django_db(
+    transaction=True, databases=['default', 'replica']
+)
+SYNCHRONOUS_LEVELS = {'OFF': 0, 'NORMAL': 1, 'FULL': 2, 'EXTRA': 3}
+
+
+def query_plan(queryset):
+    """План выполнения запроса, который построит SQLite."""
+    sql, params = queryset.query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+        return [row[-1] for row in cursor.fetchall()]
+
+
+def assert_uses_index(queryset):
+    plan = query_plan(queryset)
+    for step in plan:
+        assert not step.startswith(('SCAN', 'SEARCH')) or 'USING' in step, (
+            f'Запрос читает таблицу без индекса: {plan}'
+        )
+        assert 'TEMP B-TREE' not in step, (
+            f'Запрос сортирует результат без индекса: {plan}'
+        )
+
+
+def test_news_list_uses_index():
+    """Тест, главная берёт свежие новости по индексу."""
+    assert_uses_index(NewsList().get_queryset())
+
+
+def test_comment_page_uses_index(news, create_comments):
+    """Тест, страница комментариев выбирается по индексу."""
+    first_page = CommentPage(news, per_page=2)
+    assert_uses_index(first_page.get_queryset())
+    next_page = CommentPage(news, first_page.next_cursor, per_page=2)
+    assert_uses_index(next_page.get_queryset())
+
+
+def test_own_comments_use_index(author, comment):
+    """Тест, комментарии автора выбираются по индексу."""
+    view = CommentUpdate()
+    view.request = RequestFactory().get('/')
+    view.request.user = author
+    assert_uses_index(view.get_queryset())
+    # get_object() вызывает get(), а он сбрасывает сортировку.
+    assert_uses_index(view.get_queryset().filter(pk=comment.pk).order_by())
+
+
+@pytest.mark.parametrize(
+    'name, user_client, method, data, expected_queries',
+    [
+        ('home', CLIENT, 'get', None, 1),
+        ('detail', CLIENT, 'get', None, 2),
+        # Сессия и пользователь, новость, страница комментариев.
+        ('detail', AUTHOR_CLIENT, 'get', None, 4),
+        # Сессия и пользователь, новость, точка сохранения,
+        # вставка комментария и обновление счётчиков.
+        ('detail', AUTHOR_CLIENT, 'post', {'text': 'текст'}, 7),
+        ('detail', AUTHOR_CLIENT, 'post', {'text': 'редиска'}, 4),
+        ('edit', AUTHOR_CLIENT, 'get', None, 3),
+        ('edit', AUTHOR_CLIENT, 'post', {'text': 'текст'}, 4),
+        ('delete', AUTHOR_CLIENT, 'get', None, 3),
+        ('delete', AUTHOR_CLIENT, 'post', None, 7),
+    ]
+)
+def test_view_query_count(
+        name, user_client, method, data, expected_queries,
+        all_routes, django_assert_num_queries
+):
+    """Тест, число запросов каждого представления не растёт."""
+    url = all_routes[name]
+    with django_assert_num_queries(expected_queries):
+        getattr(user_client, method)(url, data=data or {})
+
+
+def test_warm_request_skips_session_and_user(
+        author_client, all_routes, django_assert_num_queries
+):
+    """Тест, сессия и пользователь берутся из кэша со второго запроса."""
+    url = all_routes['detail']
+    author_client.get(url)
+    # Новость и страница комментариев.
+    with django_assert_num_queries(2):
+        response = author_client.get(url)
+    assert response.context['user'].is_authenticated
+
+
+def test_password_change_ends_session(author, author_client, all_routes):
+    """Тест, после смены пароля закэшированный пользователь не входит."""
+    author_client.get(all_routes['detail'])
+    author.set_password('new-password')
+    author.save()
+    response = author_client.get(all_routes['edit'])
+    assert response.status_code == HTTPStatus.FOUND
+    assert response.url.startswith(all_routes['login'])
+
+
+def test_shared_cache_check(settings):
+    """Тест, проверка --deploy предупреждает о кэше одного процесса."""
+    assert [message.id for message in check_shared_cache(None)] == [
+        'yanews.W001'
+    ]
+    settings.CACHES = {'default': {
+        'BACKEND': 'django.core.cache.backends.memcached.PyMemcacheCache',
+    }}
+    assert check_shared_cache(None) == []
+
+
+@pytest.mark.parametrize('name', ('home', 'detail'))
+def test_not_modified_costs_one_query(
+        name, client, all_routes, django_assert_num_queries
+):
+    """Тест, неизменившаяся страница отдаётся как 304 за один запрос."""
+    url = all_routes[name]
+    etag = client.get(url)['ETag']
+    with django_assert_num_queries(1):
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+
+
+def test_no_last_modified(client, all_routes):
+    """Тест, страница сверяется только по ETag, не по дате."""
+    response = client.get(all_routes['detail'])
+    assert 'private' in response['Cache-Control']
+    assert 'Last-Modified' not in response
+    response = client.get(
+        all_routes['detail'],
+        HTTP_IF_MODIFIED_SINCE='Fri, 01 Jan 2100 00:00:00 GMT',
+    )
+    assert response.status_code == HTTPStatus.OK
+
+
+@pytest.mark.parametrize('name', ('home', 'detail'))
+def test_etag_changes_with_news_edit(name, client, news, all_routes):
+    """Тест, правка новости в обход сайта меняет ETag страницы."""
+    url = all_routes[name]
+    etag = client.get(url)['ETag']
+    news.title = 'Исправленный заголовок'
+    news.save(update_fields=('title',))
+    response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == HTTPStatus.OK
+    assert response['ETag'] != etag
+
+
+def test_etag_changes_with_comment_edit(
+        author_client, all_routes, django_capture_on_commit_callbacks
+):
+    """Тест, правка комментария меняет ETag страницы новости."""
+    url = all_routes['detail']
+    etag = author_client.get(url)['ETag']
+    with django_capture_on_commit_callbacks(execute=True):
+        author_client.post(all_routes['edit'], data={'text': 'новый текст'})
+    response = author_client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == HTTPStatus.OK
+    assert response['ETag'] != etag
+
+
+@pytest.mark.parametrize('name', ('home', 'detail'))
+def test_etag_changes_with_comments(name, author_client, all_routes):
+    """Тест, новый комментарий меняет ETag страницы."""
+    url = all_routes[name]
+    etag = author_client.get(url)['ETag']
+    author_client.post(all_routes['detail'], data={'text': 'текст'})
+    response = author_client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == HTTPStatus.OK
+    assert response['ETag'] != etag
+
+
+def test_etag_differs_per_user(client, author_client, all_routes):
+    """Тест, автор и аноним не получают одну и ту же версию страницы."""
+    url = all_routes['detail']
+    assert client.get(url)['ETag'] != author_client.get(url)['ETag']
+
+
+def test_profiling_headers(author_client, all_routes):
+    """Тест, итоги запросов отдаются в заголовках ответа."""
+    response = author_client.get(all_routes['detail'])
+    assert response['X-Query-Count'] == '4'
+    assert response['X-Query-Time'].endswith('ms')
+
+
+def test_profiling_duplicates(news, create_comments):
+    """Тест, N+1 виден как повтор одного и того же запроса."""
+    queries = RequestQueries()
+    with connection.execute_wrapper(queries):
+        authors = [comment.author for comment in news.comment_set.all()]
+    assert queries.count == len(authors) + 1
+    assert list(queries.duplicates.values()) == [len(authors)]
+    assert queries.slowest_sql is not None
+
+
+def test_query_budget_exceeded(settings, client, all_routes):
+    """Тест, превышение бюджета запросов останавливает запрос."""
+    settings.QUERY_BUDGETS = {'news:detail': 1}
+    with pytest.raises(QueryBudgetExceeded):
+        client.get(all_routes['detail'])
+
+
+def test_profiling_report(settings, client, all_routes, caplog):
+    """Тест, сводка по представлениям пишется в лог."""
+    settings.QUERY_PROFILING_LOG_INTERVAL = 0
+    with caplog.at_level(logging.INFO, logger='yanews.middleware'):
+        client.get(all_routes['home'])
+    assert 'view=news:home requests=1 queries_avg=1.0' in caplog.text
+
+
+def test_template_profile(author_client, all_routes):
+    """Тест, профиль видит страницу, её родителя, include и их запросы."""
+    with TemplateRenders().profile() as renders:
+        author_client.get(all_routes['detail'])
+    assert {
+        'news/detail.html', 'base.html', 'includes/header.html',
+        'news/news_body.html', 'news/comments.html',
+    } <= set(renders.templates)
+    # Страница комментариев выбирается лениво, при отрисовке шаблона.
+    assert renders.templates['news/comments.html'].queries == 1
+    assert renders.duration > 0
+
+
+def test_template_profile_lazy_count(news, create_comments):
+    """Тест, запрос из ленивого comment_set.count приписан шаблону."""
+    template = Template('{{ news.comment_set.count }}', name='counter.html')
+    with TemplateRenders().profile() as renders:
+        template.render(Context({'news': news}))
+    stats = renders.templates['counter.html']
+    assert stats.queries == 1
+    assert 'COUNT' in next(iter(stats.statements))
+
+
+def test_template_profiling_report(settings, client, all_routes, caplog):
+    """Тест, итоги отрисовки отдаются в заголовках и пишутся в лог."""
+    settings.TEMPLATE_PROFILING = True
+    settings.QUERY_PROFILING_LOG_INTERVAL = 0
+    with caplog.at_level(logging.INFO, logger='yanews.middleware'):
+        response = client.get(all_routes['home'])
+    assert response['X-Template-Time'].endswith('ms')
+    assert response['X-Template-Queries'] == '0'
+    assert 'template=news/home.html renders=1' in caplog.text
+
+
+def test_sqlite_pragmas_applied(settings):
+    """Тест, соединение открывается с PRAGMA из настроек."""
+    with connection.cursor() as cursor:
+        for name in ('synchronous', 'busy_timeout', 'cache_size'):
+            cursor.execute(f'PRAGMA {name}')
+            value, = cursor.fetchone()
+            expected = settings.SQLITE_PRAGMAS[name]
+            if name == 'synchronous':
+                expected = SYNCHRONOUS_LEVELS[expected]
+            assert value == expected
+
+
+def test_sqlite_pragma_injection_rejected():
+    """Тест, в PRAGMA нельзя передать произвольный SQL."""
+    with pytest.raises(ImproperlyConfigured):
+        apply_pragmas(sqlite3.connect(':memory:'), {'cache_size': '1; --'})
+
+
+@pytest.fixture
+def file_database(tmp_path):
+    """Соединение с отдельной файловой базой с настройками из проекта."""
+    settings_dict = {
+        **connection.settings_dict,
+        'NAME': str(tmp_path / 'db.sqlite3'),
+        'CONN_HEALTH_CHECKS': True,
+        'POOL_SIZE': 1,
+    }
+    database = DatabaseWrapper(settings_dict)
+    yield database
+    database.close()
+    get_pool(settings_dict).clear()
+
+
+def test_pool_reuses_connection(file_database):
+    """Тест, закрытое соединение возвращается в пул и выдаётся снова."""
+    file_database.ensure_connection()
+    raw_connection = file_database.connection
+    file_database.close()
+    other = DatabaseWrapper(file_database.settings_dict)
+    other.ensure_connection()
+    assert other.connection is raw_connection
+    other.close()
+
+
+def test_health_check_replaces_dead_connection(file_database):
+    """Тест, оборванное постоянное соединение заменяется новым."""
+    file_database.ensure_connection()
+    dead_connection = file_database.connection
+    dead_connection.close()
+    file_database.close_if_unusable_or_obsolete()
+    with file_database.cursor() as cursor:
+        cursor.execute('SELECT 1')
+    assert file_database.connection is not dead_connection
+
+
+@pytest.fixture
+def replica(settings, news):
+    """Реплика со снимком базы на момент фикстуры, чтение из неё включено."""
+    settings.READ_REPLICA = True
+    call_command('sync_replica', stdout=StringIO())
+
+
+def test_router_sends_only_app_reads_to_replica(settings):
+    """Тест, в реплику идут только чтения моделей новостей."""
+    token = read_database.set(settings.REPLICA_DATABASE)
+    try:
+        assert router.db_for_read(News) == settings.REPLICA_DATABASE
+        assert router.db_for_read(get_user_model()) == DEFAULT_DB_ALIAS
+        assert router.db_for_write(News) == DEFAULT_DB_ALIAS
+    finally:
+        read_database.reset(token)
+    assert router.db_for_read(News) == DEFAULT_DB_ALIAS
+
+
+def test_replica_middleware_off_without_setting(settings):
+    """Тест, без READ_REPLICA middleware реплики не подключается."""
+    settings.READ_REPLICA = False
+    with pytest.raises(MiddlewareNotUsed):
+        ReplicaMiddleware(HttpResponse)
+
+
+def test_replica_middleware_async(settings, rf):
+    """Тест, под ASGI middleware асинхронный и выбирает реплику."""
+    settings.READ_REPLICA = True
+    selected = []
+
+    async def get_response(request):
+        await middleware.process_view(request, NewsList.as_view(), (), {})
+        selected.append(read_database.get())
+        return HttpResponse()
+
+    middleware = ReplicaMiddleware(get_response)
+    assert asyncio.iscoroutinefunction(middleware)
+    assert asyncio.iscoroutinefunction(middleware.process_view)
+    async_to_sync(middleware)(rf.get('/'))
+    assert selected == [settings.REPLICA_DATABASE]
+    assert read_database.get() is None
+
+
+@REPLICA_DB
+def test_read_views_use_replica(replica, client, news):
+    """Тест, страницы чтения не видят того, чего ещё нет в реплике."""
+    fresh = News.objects.create(title='После копии', text='Текст')
+    home = client.get(reverse('news:home')).content.decode()
+    assert news.title in home
+    assert fresh.title not in home
+    detail_url = reverse('news:detail', args=(fresh.pk,))
+    assert client.get(detail_url).status_code == HTTPStatus.NOT_FOUND
+    call_command('sync_replica', stdout=StringIO())
+    assert client.get(detail_url).status_code == HTTPStatus.OK
+
+
+@REPLICA_DB
+def test_post_pins_reader_to_primary(settings, replica, author_client, news):
+    """Тест, после комментария автор читает из основной базы."""
+    url = reverse('news:detail', args=(news.pk,))
+    response = author_client.post(url, data={'text': 'Свежий комментарий'})
+    assert response.status_code == HTTPStatus.FOUND
+    assert response.cookies[PIN_COOKIE]['max-age'] == (
+        settings.REPLICA_PIN_SECONDS
+    )
+    assert 'Свежий комментарий' in author_client.get(url).content.decode()
+    del author_client.cookies[PIN_COOKIE]
+    assert 'Свежий комментарий' not in (
+        author_client.get(url).content.decode()
+    )
+
+
+@REPLICA_DB
+def test_fragment_cache_waits_for_replica(
+    replica, client, author_client, news
+):
+    """Тест, отставшая реплика не кэширует фрагмент под новой версией."""
+    url = reverse('news:detail', args=(news.pk,))
+    author_client.post(url, data={'text': 'Свежий комментарий'})
+    assert 'Свежий комментарий' not in client.get(url).content.decode()
+    call_command('sync_replica', stdout=StringIO())
+    assert 'Свежий комментарий' in client.get(url).content.decode()
@@ -0,0 +1,79 @@
+"""Полнотекстовый поиск по новостям через SQLite FTS5."""
+import re
+
+from django.db import connection
+from django.utils.functional import cached_property
+
+from .models import News
+
+FTS_TABLE = 'news_news_fts'
+# Веса bm25 для колонок title и text: совпадение в заголовке важнее.
+BM25_WEIGHTS = (10.0, 1.0)
+
+
+def fts_query(text):
+    """
+    Превращает строку пользователя в запрос FTS5.
+
+    Каждое слово берётся в кавычки и ищется как префикс,
+    поэтому синтаксис FTS5 во вводе не приводит к ошибкам.
+    """
+    return ' '.join(f'"{word}"*' for word in re.findall(r'\w+', text))
+
+
+def rebuild_index():
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')"
+        )
+
+
+class SearchResults:
+    """
+    Новости, найденные по запросу, в порядке bm25.
+
+    Поддерживает count() и срезы, поэтому подходит для Paginator:
+    из индекса выбираются только id одной страницы.
+    """
+
+    model = News
+
+    def __init__(self, text):
+        self.match = fts_query(text)
+
+    def _execute(self, sql, params):
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            return cursor.fetchall()
+
+    @cached_property
+    def _count(self):
+        if not self.match:
+            return 0
+        (count,), = self._execute(
+            f'SELECT COUNT(*) FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s',
+            (self.match,)
+        )
+        return count
+
+    def count(self):
+        return self._count
+
+    def __len__(self):
+        return self._count
+
+    def __getitem__(self, page):
+        if not isinstance(page, slice) or page.step:
+            raise TypeError('Результаты поиска поддерживают только срезы.')
+        if not self.match:
+            return []
+        start = page.start or 0
+        limit = -1 if page.stop is None else max(page.stop - start, 0)
+        rows = self._execute(
+            f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s '
+            f'ORDER BY bm25({FTS_TABLE}, %s, %s) LIMIT %s OFFSET %s',
+            (self.match, *BM25_WEIGHTS, limit, start)
+        )
+        ids = [pk for pk, in rows]
+        news = self.model.objects.in_bulk(ids)
+        return [news[pk] for pk in ids if pk in news]
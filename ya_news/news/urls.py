@@ -1,12 +1,19 @@
 from django.urls import path
 
 from news import views
+from yanews.asynchronous import read_view
 
 app_name = 'news'
 
 urlpatterns = [
-    path('', views.NewsList.as_view(), name='home'),
-    path('news/<int:pk>/', views.NewsDetailView.as_view(), name='detail'),
+    path('', read_view(views.NewsList), name='home'),
+    path('search/', views.NewsSearch.as_view(), name='search'),
+    path('news/<int:pk>/', read_view(views.NewsDetailView), name='detail'),
+    path(
+        'news/<int:pk>/comments/',
+        views.NewsComments.as_view(),
+        name='comments'
+    ),
     path(
         'delete_comment/<int:pk>/',
         views.CommentDelete.as_view(),
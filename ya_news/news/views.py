@@ -1,50 +1,133 @@
 from django.conf import settings
 from django.contrib.auth.mixins import LoginRequiredMixin
+from django.db import transaction
+from django.http import JsonResponse
 from django.shortcuts import get_object_or_404
+from django.template.loader import render_to_string
 from django.urls import reverse
+from django.utils.functional import cached_property
 from django.views import generic
 
+from yanews.conditional import ConditionalGetMixin
+from yanews.replica import read_generation
+
+from .caching import get_comments_version
 from .forms import CommentForm
 from .models import Comment, News
+from .pagination import CommentPage
+from .search import SearchResults
+from .writebehind import comment_writer
 
 
-class NewsList(generic.ListView):
+class NewsList(ConditionalGetMixin, generic.ListView):
     """Список новостей."""
 
     model = News
+    replica_reads = True
     template_name = 'news/home.html'
 
-    def get_queryset(self):
+    @cached_property
+    def latest_news(self):
         """
         Выводим только несколько последних новостей.
 
         Их количество определяется в настройках проекта.
+        Число комментариев берётся из счётчика в самой новости,
+        таблица комментариев не затрагивается.
+        """
+        return self.model.objects.all()[:settings.NEWS_COUNT_ON_HOME_PAGE]
+
+    def get_queryset(self):
+        return self.latest_news
+
+    def get_version(self):
         """
-        return self.model.objects.prefetch_related(
-            'comment_set'
-        )[:settings.NEWS_COUNT_ON_HOME_PAGE]
+        Версия главной — новости на ней, их правки и счётчики комментариев.
+
+        Это та же выборка, что и для страницы, она выполняется один раз.
+        """
+        return tuple(
+            (news.pk, news.updated, news.comment_count, news.last_comment_at)
+            for news in self.latest_news
+        )
+
+
+class NewsSearch(generic.ListView):
+    """Полнотекстовый поиск по новостям."""
+    template_name = 'news/search.html'
 
+    def get_paginate_by(self, queryset):
+        return settings.SEARCH_RESULTS_PER_PAGE
 
-class NewsDetail(generic.DetailView):
+    def get_queryset(self):
+        return SearchResults(self.request.GET.get('q', ''))
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['query'] = self.request.GET.get('q', '')
+        return context
+
+
+class CommentPageMixin:
+    """Добавляет в контекст одну страницу комментариев новости."""
+
+    def get_comment_page(self):
+        return CommentPage(self.object, self.request.GET.get('after'))
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['comments'] = self.get_comment_page()
+        return context
+
+
+class NewsDetail(ConditionalGetMixin, CommentPageMixin, generic.DetailView):
     model = News
     template_name = 'news/detail.html'
 
+    @cached_property
+    def news(self):
+        return get_object_or_404(self.model, pk=self.kwargs['pk'])
+
+    @cached_property
+    def replica_generation(self):
+        return read_generation()
+
     def get_object(self, queryset=None):
-        obj = get_object_or_404(
-            self.model.objects.prefetch_related('comment_set__author'),
-            pk=self.kwargs['pk']
+        return self.news
+
+    def get_version(self):
+        """
+        Версия страницы — правка новости, её счётчики и версия комментариев.
+
+        Проверка стоит одного запроса строки новости, которая затем
+        идёт и в страницу. Правки и удаления комментариев меняют
+        версию комментариев, поэтому попадают в ETag. При чтении
+        из реплики в версию входит и номер её копии.
+        """
+        generation = self.replica_generation
+        news = self.news
+        return (
+            news.pk, news.updated, news.comment_count, news.last_comment_at,
+            get_comments_version(news.pk), generation,
+            self.request.GET.get('after'),
         )
-        return obj
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         if self.request.user.is_authenticated:
             context['form'] = CommentForm()
+        else:
+            # Анонимам отдаём закэшированный фрагмент, пока комментарии
+            # не изменились: страница комментариев загрузится лениво.
+            context['comments_version'] = get_comments_version(self.object.pk)
+            context['replica_generation'] = self.replica_generation
+            context['news_cache_timeout'] = settings.NEWS_DETAIL_CACHE_TIMEOUT
         return context
 
 
 class NewsComment(
         LoginRequiredMixin,
+        CommentPageMixin,
         generic.detail.SingleObjectMixin,
         generic.FormView
 ):
@@ -60,15 +143,41 @@ class NewsComment(
         comment = form.save(commit=False)
         comment.news = self.object
         comment.author = self.request.user
-        comment.save()
+        if settings.COMMENT_WRITE_BEHIND:
+            comment_writer.submit(comment)
+            return super().form_valid(form)
+        # Счётчики новости сдвигает сигнал post_save в той же транзакции.
+        with transaction.atomic():
+            comment.save()
         return super().form_valid(form)
 
     def get_success_url(self):
-        post = self.get_object()
-        return reverse('news:detail', kwargs={'pk': post.pk}) + '#comments'
+        return reverse(
+            'news:detail', kwargs={'pk': self.object.pk}
+        ) + '#comments'
+
+
+class NewsComments(generic.detail.SingleObjectMixin, generic.View):
+    """Страница комментариев новости в виде JSON-фрагмента."""
+    model = News
+
+    def get(self, request, *args, **kwargs):
+        news = self.get_object()
+        comments = CommentPage(news, request.GET.get('after'))
+        next_url = None
+        if comments.next_cursor:
+            next_url = '{}?after={}'.format(
+                reverse('news:comments', kwargs={'pk': news.pk}),
+                comments.next_cursor
+            )
+        html = render_to_string(
+            'news/comments.html', {'comments': comments}, request=request
+        )
+        return JsonResponse({'html': html, 'next': next_url})
 
 
 class NewsDetailView(generic.View):
+    replica_reads = True
 
     def get(self, request, *args, **kwargs):
         view = NewsDetail.as_view()
@@ -84,14 +193,15 @@ class CommentBase(LoginRequiredMixin):
     model = Comment
 
     def get_success_url(self):
-        comment = self.get_object()
         return reverse(
-            'news:detail', kwargs={'pk': comment.news.pk}
+            'news:detail', kwargs={'pk': self.object.news_id}
         ) + '#comments'
 
     def get_queryset(self):
         """Пользователь может работать только со своими комментариями."""
-        return self.model.objects.filter(author=self.request.user)
+        return self.model.objects.select_related('news').filter(
+            author=self.request.user
+        )
 
 
 class CommentUpdate(CommentBase, generic.UpdateView):
@@ -103,3 +213,8 @@ class CommentUpdate(CommentBase, generic.UpdateView):
 class CommentDelete(CommentBase, generic.DeleteView):
     """Удаление комментария."""
     template_name = 'news/delete.html'
+
+    @transaction.atomic
+    def delete(self, request, *args, **kwargs):
+        # Счётчики новости сдвигает сигнал post_delete.
+        return super().delete(request, *args, **kwargs)
@@ -0,0 +1,150 @@
+"""
+Запись комментариев пачками через фоновый поток.
+
+SQLite пропускает писателей по одному, и при наплыве комментариев
+каждый POST ждёт своей очереди на транзакцию. Здесь комментарии
+из всех запросов процесса складываются в одну очередь, а фоновый
+поток забирает всё накопившееся и пишет одной транзакцией: один
+bulk_create, по одному обновлению счётчиков на новость.
+
+Запрос ждёт, пока его пачка будет записана, поэтому после редиректа
+на страницу новости автор видит свой комментарий, даже если редирект
+обслужит другой процесс. Очередь одна и разбирается по порядку,
+так что комментарии одного пользователя ложатся в том порядке,
+в котором он их отправил. Дольше COMMENT_WRITE_BEHIND_TIMEOUT секунд
+запрос не ждёт: зависший поток не должен держать запросы вечно.
+"""
+import os
+import queue
+import threading
+from collections import Counter
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+
+from .caching import bump_comments_version
+from .models import Comment, News
+
+
+def save_comments(comments):
+    """Вставляет комментарии одним запросом и сдвигает счётчики новостей."""
+    per_news = Counter(comment.news_id for comment in comments)
+    with transaction.atomic():
+        Comment.objects.bulk_create(comments)
+        for news_id, count in per_news.items():
+            News.objects.filter(pk=news_id).update_comment_counters(count)
+    for news_id in per_news:
+        bump_comments_version(news_id)
+
+
+class CommentWriteTimeout(Exception):
+    """Поток записи не записал комментарий за отведённое время."""
+
+
+class PendingComment:
+    """Комментарий в очереди и сигнал о том, что его пачка записана."""
+
+    def __init__(self, comment):
+        self.comment = comment
+        self.saved = threading.Event()
+        self.error = None
+        # Запрос перестал ждать, и писать комментарий уже не нужно.
+        self.abandoned = False
+
+
+class CommentWriter:
+    """
+    Очередь комментариев процесса и поток, который её разбирает.
+
+    Искусственной задержки нет: пока пишется одна пачка, следующие
+    комментарии копятся в очереди и уходят следующей пачкой,
+    не больше COMMENT_WRITE_BEHIND_BATCH_SIZE за раз.
+    """
+
+    def __init__(self):
+        self.queue = queue.Queue()
+        self.lock = threading.Lock()
+        self.thread = None
+        self.pid = None
+
+    def ensure_started(self):
+        # После fork поток родителя в дочернем процессе не работает.
+        if self.pid == os.getpid() and self.thread.is_alive():
+            return
+        with self.lock:
+            if self.pid == os.getpid() and self.thread.is_alive():
+                return
+            if self.pid != os.getpid():
+                self.queue = queue.Queue()
+            self.thread = threading.Thread(
+                target=self.run, name='comment-writer', daemon=True
+            )
+            self.thread.start()
+            self.pid = os.getpid()
+
+    def submit(self, comment):
+        """Ставит комментарий в очередь и ждёт, пока он будет записан."""
+        self.ensure_started()
+        pending = PendingComment(comment)
+        self.queue.put(pending)
+        timeout = settings.COMMENT_WRITE_BEHIND_TIMEOUT
+        if not pending.saved.wait(timeout):
+            pending.abandoned = True
+            raise CommentWriteTimeout(
+                f'Комментарий не записан за {timeout} с: '
+                f'поток {self.thread.name} не отвечает.'
+            )
+        if pending.error is not None:
+            raise pending.error
+        return comment
+
+    def take_batch(self):
+        batch = [self.queue.get()]
+        while len(batch) < settings.COMMENT_WRITE_BEHIND_BATCH_SIZE:
+            try:
+                batch.append(self.queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def write(self, batch):
+        """
+        Пишет пачку одной транзакцией.
+
+        Если пачка не записалась, комментарии пишутся по одному: ошибка
+        одного из них, например у удалённой тем временем новости,
+        не должна ронять запросы остальных авторов.
+        """
+        batch = [pending for pending in batch if not pending.abandoned]
+        if not batch:
+            return
+        try:
+            save_comments([pending.comment for pending in batch])
+            return
+        except Exception as error:
+            if len(batch) == 1:
+                batch[0].error = error
+                return
+        for pending in batch:
+            try:
+                save_comments([pending.comment])
+            except Exception as error:
+                pending.error = error
+
+    def run(self):
+        while True:
+            batch = self.take_batch()
+            try:
+                # Поток живёт дольше запросов: соблюдаем CONN_MAX_AGE сами.
+                close_old_connections()
+                self.write(batch)
+            except Exception as error:
+                # Поток должен пережить ошибку, а запросы — узнать о ней.
+                for pending in batch:
+                    pending.error = pending.error or error
+            finally:
+                for pending in batch:
+                    pending.saved.set()
+
+
+comment_writer = CommentWriter()
@@ -0,0 +1,104 @@
+"""
+Асинхронные варианты представлений для запуска под ASGI.
+
+В Django 3.2 нет асинхронного ORM, а ASGIHandler выполняет все
+синхронные представления в одном общем потоке, так что под ASGI
+запросы к базе разных посетителей идут строго по очереди.
+Асинхронное представление отсюда выполняет CBV вместе с отрисовкой
+шаблона в пуле потоков: цикл событий не блокируется, а чтения разных
+запросов идут параллельно, каждое на соединении своего потока.
+
+Потоковый ответ ASGIHandler перебирает синхронно прямо в цикле
+событий, поэтому тело, которое читается из базы, отдаётся
+асинхронным итератором через StreamingASGIHandler.
+"""
+import functools
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIHandler
+from django.db import close_old_connections
+from django.http import StreamingHttpResponse
+
+
+def database_sync_to_async(func):
+    """
+    sync_to_async для кода с запросами к базе.
+
+    Поток пула не получает сигналов начала и конца запроса, поэтому
+    устаревшие соединения закрываются здесь: так соблюдаются
+    CONN_MAX_AGE и проверки соединений.
+    """
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        close_old_connections()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            close_old_connections()
+    return sync_to_async(wrapper, thread_sensitive=False)
+
+
+def as_async_view(view_class, **initkwargs):
+    """Асинхронное представление из CBV, ответ отрисовывается в пуле."""
+    view = view_class.as_view(**initkwargs)
+
+    @database_sync_to_async
+    def render_view(request, *args, **kwargs):
+        response = view(request, *args, **kwargs)
+        if callable(getattr(response, 'render', None)):
+            response.render()
+        return response
+
+    async def async_view(request, *args, **kwargs):
+        return await render_view(request, *args, **kwargs)
+
+    async_view.view_class = view_class
+    async_view.view_initkwargs = initkwargs
+    return async_view
+
+
+def read_view(view_class, **initkwargs):
+    """Представление для чтения: асинхронное, если включено ASYNC_VIEWS."""
+    if settings.ASYNC_VIEWS:
+        return as_async_view(view_class, **initkwargs)
+    return view_class.as_view(**initkwargs)
+
+
+class AsyncStreamingHttpResponse(StreamingHttpResponse):
+    """
+    Потоковый ответ, тело которого — асинхронный итератор.
+
+    Тело отдаёт только StreamingASGIHandler: для синхронного перебора
+    ответ пуст.
+    """
+
+    def __init__(self, async_content, *args, **kwargs):
+        super().__init__((), *args, **kwargs)
+        self.async_content = async_content
+
+
+class StreamingASGIHandler(ASGIHandler):
+    """ASGIHandler, который умеет отдавать AsyncStreamingHttpResponse."""
+
+    async def send_response(self, response, send):
+        if not isinstance(response, AsyncStreamingHttpResponse):
+            return await super().send_response(response, send)
+
+        async def send_with_body(message):
+            # Заголовки и закрытие ответа остаются за ASGIHandler,
+            # тело вставляется перед его последним сообщением.
+            if (message['type'] == 'http.response.body'
+                    and not message.get('more_body')):
+                async for part in response.async_content:
+                    for chunk, _ in self.chunk_bytes(
+                        response.make_bytes(part)
+                    ):
+                        await send({
+                            'type': 'http.response.body',
+                            'body': chunk,
+                            'more_body': True,
+                        })
+            await send(message)
+
+        await super().send_response(response, send_with_body)
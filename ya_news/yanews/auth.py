@@ -0,0 +1,110 @@
+"""
+Пользователь запроса из кэша вместо выборки из auth_user.
+
+Вместе с сессиями cached_db или signed_cookies страница
+для вошедшего пользователя не тратит запросов к БД до представления.
+
+Кэш должен быть общим для всех процессов сервера: выход и смена
+пароля сбрасывают копии только в том кэше, который видит процесс
+запроса. С LocMemCache и несколькими воркерами пользователь остаётся
+вошедшим в других процессах, пока копия не истечёт. Проверка
+check_shared_cache напоминает об этом в manage.py check --deploy.
+"""
+from django.conf import settings
+from django.contrib import auth
+from django.contrib.auth import get_user_model
+from django.contrib.auth.middleware import AuthenticationMiddleware
+from django.contrib.auth.models import AnonymousUser
+from django.core import checks
+from django.core.cache import cache
+from django.db.models.signals import post_delete, post_save
+from django.utils.crypto import constant_time_compare
+from django.utils.functional import SimpleLazyObject
+
+
+def user_cache_key(user_id):
+    return f'auth:user:{user_id}'
+
+
+def get_cached_user(request):
+    """
+    То же, что django.contrib.auth.get_user, но пользователь из кэша.
+
+    Хэш из сессии по-прежнему сверяется с паролем пользователя,
+    поэтому смена пароля завершает и сессии с закэшированным
+    пользователем.
+    """
+    try:
+        user_id = get_user_model()._meta.pk.to_python(
+            request.session[auth.SESSION_KEY]
+        )
+        backend_path = request.session[auth.BACKEND_SESSION_KEY]
+    except KeyError:
+        return AnonymousUser()
+    if backend_path not in settings.AUTHENTICATION_BACKENDS:
+        return AnonymousUser()
+    key = user_cache_key(user_id)
+    user = cache.get(key)
+    if user is None:
+        user = auth.load_backend(backend_path).get_user(user_id)
+        if user is None:
+            return AnonymousUser()
+        cache.set(key, user, settings.AUTH_USER_CACHE_TIMEOUT)
+    session_hash = request.session.get(auth.HASH_SESSION_KEY)
+    if not (session_hash and constant_time_compare(
+        session_hash, user.get_session_auth_hash()
+    )):
+        request.session.flush()
+        return AnonymousUser()
+    return user
+
+
+def forget_user(sender, instance, **kwargs):
+    """Сохранение или удаление пользователя сбрасывает его копию в кэше."""
+    cache.delete(user_cache_key(instance.pk))
+
+
+class CachedAuthenticationMiddleware(AuthenticationMiddleware):
+    """
+    AuthenticationMiddleware с пользователем из кэша.
+
+    Копия живёт AUTH_USER_CACHE_TIMEOUT секунд и сбрасывается при
+    save() и delete() пользователя; изменения через QuerySet.update()
+    видны не позже, чем истечёт этот срок.
+    """
+
+    def process_request(self, request):
+        super().process_request(request)
+        request.user = SimpleLazyObject(lambda: get_cached_user(request))
+
+
+def check_shared_cache(app_configs, **kwargs):
+    """Предупреждает, если кэш пользователей и сессий свой у процесса."""
+    uses_cache = (
+        'yanews.auth.CachedAuthenticationMiddleware' in settings.MIDDLEWARE
+        or settings.SESSION_ENGINE.endswith('.cache')
+        or settings.SESSION_ENGINE.endswith('.cached_db')
+    )
+    backend = settings.CACHES['default']['BACKEND']
+    if not uses_cache or not backend.endswith('.LocMemCache'):
+        return []
+    return [checks.Warning(
+        'Пользователи и сессии кэшируются в LocMemCache, у каждого '
+        'процесса свой: выход и смена пароля не доходят до других '
+        'воркеров до истечения AUTH_USER_CACHE_TIMEOUT.',
+        hint=(
+            'Задайте общий кэш через CACHE_BACKEND и CACHE_LOCATION, '
+            'например Memcached или Redis, или запускайте один процесс.'
+        ),
+        id='yanews.W001',
+    )]
+
+
+post_save.connect(
+    forget_user, sender=settings.AUTH_USER_MODEL,
+    dispatch_uid='yanews.auth.forget_user_on_save'
+)
+post_delete.connect(
+    forget_user, sender=settings.AUTH_USER_MODEL,
+    dispatch_uid='yanews.auth.forget_user_on_delete'
+)
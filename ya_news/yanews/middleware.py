@@ -0,0 +1,295 @@
+"""Учёт SQL-запросов, бюджеты запросов и профиль отрисовки шаблонов."""
+import contextvars
+import functools
+import logging
+import threading
+import time
+from collections import Counter, defaultdict
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.template.base import Template
+
+logger = logging.getLogger(__name__)
+
+current_renders = contextvars.ContextVar('current_renders', default=None)
+
+
+class QueryBudgetExceeded(Exception):
+    """Представление выполнило больше запросов, чем ему разрешено."""
+
+
+class RequestQueries:
+    """Обёртка над выполнением SQL, копящая статистику одного запроса."""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.slowest_duration = 0.0
+        self.slowest_sql = None
+        self.statements = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - start
+            self.count += 1
+            self.duration += elapsed
+            self.statements[sql] += 1
+            if elapsed >= self.slowest_duration:
+                self.slowest_duration = elapsed
+                self.slowest_sql = sql
+
+    @property
+    def duplicates(self):
+        """
+        Запросы, повторённые с разными параметрами.
+
+        В обёртку приходит SQL с плейсхолдерами, поэтому N+1
+        выглядит как один и тот же текст запроса много раз подряд.
+        """
+        return {sql: n for sql, n in self.statements.items() if n > 1}
+
+
+class ViewTotals:
+    """Накопленная статистика одного представления между отчётами."""
+
+    def __init__(self):
+        self.requests = 0
+        self.queries = 0
+        self.duration = 0.0
+        self.slowest_duration = 0.0
+        self.slowest_sql = None
+        self.duplicates = 0
+
+    def add(self, queries):
+        self.requests += 1
+        self.queries += queries.count
+        self.duration += queries.duration
+        self.duplicates += sum(queries.duplicates.values())
+        if queries.slowest_duration >= self.slowest_duration:
+            self.slowest_duration = queries.slowest_duration
+            self.slowest_sql = queries.slowest_sql
+
+
+class QueryBudgetMiddleware:
+    """
+    Считает запросы к БД для каждого представления.
+
+    Включается настройкой QUERY_PROFILING. Итоги запроса отдаются
+    в заголовках X-Query-Count и X-Query-Time, сводка по представлениям
+    пишется в лог раз в QUERY_PROFILING_LOG_INTERVAL секунд.
+    Превышение бюджета из QUERY_BUDGETS вызывает QueryBudgetExceeded,
+    если включена QUERY_BUDGET_RAISE, иначе пишется предупреждение.
+    """
+
+    def __init__(self, get_response):
+        if not settings.QUERY_PROFILING:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.totals = defaultdict(ViewTotals)
+        self.lock = threading.Lock()
+        self.last_report = time.monotonic()
+
+    def __call__(self, request):
+        queries = RequestQueries()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(queries))
+            response = self.get_response(request)
+        view_name = self.get_view_name(request)
+        response['X-Query-Count'] = queries.count
+        response['X-Query-Time'] = f'{queries.duration * 1000:.2f}ms'
+        if queries.duplicates:
+            response['X-Query-Duplicates'] = sum(queries.duplicates.values())
+        self.collect(view_name, queries)
+        self.check_budget(view_name, queries)
+        return response
+
+    @staticmethod
+    def get_view_name(request):
+        match = request.resolver_match
+        return match.view_name if match else request.path_info
+
+    def collect(self, view_name, queries):
+        with self.lock:
+            self.totals[view_name].add(queries)
+            now = time.monotonic()
+            if now - self.last_report < settings.QUERY_PROFILING_LOG_INTERVAL:
+                return
+            totals, self.totals = self.totals, defaultdict(ViewTotals)
+            self.last_report = now
+        for name, view in sorted(totals.items()):
+            logger.info(
+                'view=%s requests=%d queries_avg=%.1f sql_ms_avg=%.2f '
+                'duplicates=%d slowest_ms=%.2f slowest_sql=%s',
+                name,
+                view.requests,
+                view.queries / view.requests,
+                view.duration * 1000 / view.requests,
+                view.duplicates,
+                view.slowest_duration * 1000,
+                view.slowest_sql,
+            )
+
+    @staticmethod
+    def check_budget(view_name, queries):
+        budget = settings.QUERY_BUDGETS.get(view_name)
+        if budget is None or queries.count <= budget:
+            return
+        message = (
+            f'{view_name}: выполнено запросов {queries.count}, '
+            f'бюджет {budget}. Повторы: {queries.duplicates}'
+        )
+        if settings.QUERY_BUDGET_RAISE:
+            raise QueryBudgetExceeded(message)
+        logger.warning(message)
+
+
+def install_render_hook():
+    """
+    Оборачивает Template._render замером времени, один раз на процесс.
+
+    Через _render проходят и страница, и её родитель из extends,
+    и каждый include. Пока профиль не включён, обёртка сразу
+    передаёт управление исходному методу.
+    """
+    render = Template._render
+    if getattr(render, 'profiled', False):
+        return
+
+    @functools.wraps(render)
+    def profiled_render(template, context):
+        renders = current_renders.get()
+        if renders is None:
+            return render(template, context)
+        with renders.measure(template):
+            return render(template, context)
+
+    profiled_render.profiled = True
+    Template._render = profiled_render
+
+
+class TemplateStats:
+    """Отрисовки одного шаблона: число, время с вложенными, запросы."""
+
+    def __init__(self):
+        self.renders = 0
+        self.duration = 0.0
+        self.queries = 0
+        self.statements = Counter()
+
+
+class TemplateRenders:
+    """
+    Профиль отрисовки шаблонов за время одного запроса.
+
+    Запрос к БД приписывается самому вложенному шаблону, который
+    в этот момент отрисовывается: так ленивые вызовы вроде
+    comment_set.count из шаблона видны рядом с его именем.
+    """
+
+    def __init__(self):
+        self.stack = []
+        self.templates = defaultdict(TemplateStats)
+        self.duration = 0.0
+        self.queries = 0
+
+    @staticmethod
+    def get_name(template):
+        return template.origin.template_name or template.name or '<string>'
+
+    @contextmanager
+    def measure(self, template):
+        name = self.get_name(template)
+        self.stack.append(name)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self.stack.pop()
+            stats = self.templates[name]
+            stats.renders += 1
+            stats.duration += elapsed
+            if not self.stack:
+                self.duration += elapsed
+
+    def __call__(self, execute, sql, params, many, context):
+        if self.stack:
+            stats = self.templates[self.stack[-1]]
+            stats.queries += 1
+            stats.statements[sql] += 1
+            self.queries += 1
+        return execute(sql, params, many, context)
+
+    @contextmanager
+    def profile(self):
+        """Включает профиль для отрисовок и запросов внутри блока."""
+        install_render_hook()
+        token = current_renders.set(self)
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(self))
+                yield self
+        finally:
+            current_renders.reset(token)
+
+
+class TemplateProfilerMiddleware:
+    """
+    Замеряет отрисовку шаблонов и запросы к БД из шаблонов.
+
+    Включается настройкой TEMPLATE_PROFILING. Итоги запроса отдаются
+    в заголовках X-Template-Time и X-Template-Queries, сводка
+    по шаблонам пишется в лог раз в QUERY_PROFILING_LOG_INTERVAL секунд.
+    """
+
+    def __init__(self, get_response):
+        if not settings.TEMPLATE_PROFILING:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.totals = defaultdict(TemplateStats)
+        self.lock = threading.Lock()
+        self.last_report = time.monotonic()
+
+    def __call__(self, request):
+        renders = TemplateRenders()
+        with renders.profile():
+            response = self.get_response(request)
+        response['X-Template-Time'] = f'{renders.duration * 1000:.2f}ms'
+        response['X-Template-Queries'] = renders.queries
+        self.collect(renders)
+        return response
+
+    def collect(self, renders):
+        with self.lock:
+            for name, stats in renders.templates.items():
+                total = self.totals[name]
+                total.renders += stats.renders
+                total.duration += stats.duration
+                total.queries += stats.queries
+                total.statements.update(stats.statements)
+            now = time.monotonic()
+            if now - self.last_report < settings.QUERY_PROFILING_LOG_INTERVAL:
+                return
+            totals, self.totals = self.totals, defaultdict(TemplateStats)
+            self.last_report = now
+        for name, stats in sorted(
+            totals.items(), key=lambda item: -item[1].duration
+        ):
+            top_sql = stats.statements.most_common(1)
+            logger.info(
+                'template=%s renders=%d render_ms_avg=%.2f queries=%d '
+                'top_sql=%s',
+                name,
+                stats.renders,
+                stats.duration * 1000 / stats.renders,
+                stats.queries,
+                top_sql[0][0] if top_sql else None,
+            )
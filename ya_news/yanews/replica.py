@@ -0,0 +1,152 @@
+"""
+Чтение страниц из реплики SQLite и закрепление за основной базой.
+
+Реплика — копия основной базы, которую обновляет manage.py
+sync_replica. Представления с replica_reads = True читают модели
+из REPLICA_APPS в реплике, если включено READ_REPLICA. Запись всегда
+идёт в основную базу. После успешного POST посетитель на
+REPLICA_PIN_SECONDS получает cookie и всё это время читает из
+основной базы, поэтому видит свои изменения до синхронизации реплики.
+"""
+import asyncio
+import contextvars
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import DEFAULT_DB_ALIAS, connections
+
+PIN_COOKIE = 'read_primary'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+read_database = contextvars.ContextVar('read_database', default=None)
+
+
+def copy_database(source, target):
+    """
+    Копирует базу source в target через резервное копирование SQLite.
+
+    Перед копией увеличивает номер копии в PRAGMA user_version основной
+    базы, так что номер приходит в реплику вместе с данными.
+    """
+    with source.cursor() as cursor:
+        cursor.execute('PRAGMA user_version')
+        generation = cursor.fetchone()[0] + 1
+        cursor.execute(f'PRAGMA user_version = {generation:d}')
+    target.ensure_connection()
+    source.connection.backup(target.connection)
+    return generation
+
+
+def read_generation():
+    """
+    Номер копии реплики, из которой читает запрос, или None.
+
+    Ключи кэша, построенные по данным реплики, включают этот номер:
+    иначе отставшая реплика сохранит старые данные под ключом, который
+    уже сменила запись в основную базу. Номер читается до данных,
+    поэтому под ним бывают только данные не старше копии.
+    """
+    alias = read_database.get()
+    if alias is None:
+        return None
+    with connections[alias].cursor() as cursor:
+        cursor.execute('PRAGMA user_version')
+        return cursor.fetchone()[0]
+
+
+class ReplicaRouter:
+    """Чтение из базы, выбранной для текущего запроса, запись — в основную."""
+
+    def routed(self, model):
+        return model._meta.app_label in settings.REPLICA_APPS
+
+    def db_for_read(self, model, **hints):
+        if self.routed(model):
+            return read_database.get()
+        return None
+
+    def db_for_write(self, model, **hints):
+        if self.routed(model):
+            return DEFAULT_DB_ALIAS
+        return None
+
+    def allow_relation(self, obj1, obj2, **hints):
+        aliases = {DEFAULT_DB_ALIAS, settings.REPLICA_DATABASE}
+        if {obj1._state.db, obj2._state.db} <= aliases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        """Схему реплики не мигрируем: она приходит вместе с копией."""
+        if db == settings.REPLICA_DATABASE:
+            return False
+        return None
+
+
+class ReplicaMiddleware:
+    """
+    Выбирает базу для чтения на время запроса.
+
+    Реплика используется только для безопасных запросов к помеченным
+    представлениям и только без cookie закрепления. Без READ_REPLICA
+    middleware не подключается. Под ASGI работает асинхронно, чтобы
+    не переводить цепочку middleware в один общий поток.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.READ_REPLICA:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(get_response):
+            # Как в MiddlewareMixin: обработчик ждёт от нас корутину.
+            # process_view тоже асинхронный, иначе обработчик вызовет
+            # его через sync_to_async в общем потоке.
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+            self.process_view = self.aprocess_view
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        token = read_database.set(None)
+        try:
+            response = self.get_response(request)
+        finally:
+            read_database.reset(token)
+        return self.pin(request, response)
+
+    async def __acall__(self, request):
+        token = read_database.set(None)
+        try:
+            response = await self.get_response(request)
+        finally:
+            read_database.reset(token)
+        return self.pin(request, response)
+
+    @staticmethod
+    def pin(request, response):
+        """После успешной записи закрепляет посетителя за основной базой."""
+        if request.method not in SAFE_METHODS and response.status_code < 400:
+            response.set_cookie(
+                PIN_COOKIE, '1', max_age=settings.REPLICA_PIN_SECONDS,
+                httponly=True, samesite='Lax'
+            )
+        return response
+
+    @staticmethod
+    def select_database(request, view_func):
+        view_class = getattr(view_func, 'view_class', None)
+        if (
+            getattr(view_class, 'replica_reads', False)
+            and request.method in SAFE_METHODS
+            and PIN_COOKIE not in request.COOKIES
+        ):
+            read_database.set(settings.REPLICA_DATABASE)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        self.select_database(request, view_func)
+
+    async def aprocess_view(self, request, view_func, view_args, view_kwargs):
+        self.select_database(request, view_func)
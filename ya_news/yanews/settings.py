@@ -1,3 +1,4 @@
+import os
 from pathlib import Path
 
 from django.urls import reverse_lazy
@@ -21,23 +22,37 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'yanews.middleware.QueryBudgetMiddleware',
+    'yanews.middleware.TemplateProfilerMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'yanews.replica.ReplicaMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
-    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'yanews.auth.CachedAuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
 ROOT_URLCONF = 'yanews.urls'
 
+TEMPLATE_LOADERS = [
+    'django.template.loaders.filesystem.Loader',
+    'django.template.loaders.app_directories.Loader',
+]
+# Скомпилированные шаблоны хранятся в памяти процесса. При DEBUG
+# runserver сбрасывает этот кэш, когда файл шаблона меняется.
+if os.getenv('CACHED_TEMPLATES', '1') == '1':
+    TEMPLATE_LOADERS = [
+        ('django.template.loaders.cached.Loader', TEMPLATE_LOADERS),
+    ]
+
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
         'DIRS': [BASE_DIR / 'templates'],
-        'APP_DIRS': True,
         'OPTIONS': {
+            'loaders': TEMPLATE_LOADERS,
             'context_processors': [
                 'django.template.context_processors.debug',
                 'django.template.context_processors.request',
@@ -51,14 +66,79 @@ TEMPLATES = [
 WSGI_APPLICATION = 'yanews.wsgi.application'
 
 
+# Настройки SQLite для конкурентной записи, см. yanews.sqlite_backend.
+# Значения можно переопределить переменными окружения SQLITE_*.
+SQLITE_PRAGMAS = {
+    'journal_mode': os.getenv('SQLITE_JOURNAL_MODE', 'WAL'),
+    'synchronous': os.getenv('SQLITE_SYNCHRONOUS', 'NORMAL'),
+    'busy_timeout': int(os.getenv('SQLITE_BUSY_TIMEOUT', 5000)),
+    'mmap_size': int(os.getenv('SQLITE_MMAP_SIZE', 64 * 1024 * 1024)),
+    # Отрицательное значение задаёт размер кэша в КиБ.
+    'cache_size': int(os.getenv('SQLITE_CACHE_SIZE', -16000)),
+}
+
+# Без TEST_SQLITE_NAME тестовые базы в памяти. ':memory:' указан явно:
+# pytest-django не знает движок проекта и иначе строит для воркеров xdist
+# имя вида test_/путь/к/db.sqlite3_gw0, которое SQLite не открывает.
+TEST_SQLITE_NAME = os.getenv('TEST_SQLITE_NAME')
+
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        'ENGINE': 'yanews.sqlite_backend',
+        'NAME': os.getenv('SQLITE_NAME', BASE_DIR / 'db.sqlite3'),
+        'PRAGMAS': SQLITE_PRAGMAS,
+        'TRANSACTION_MODE': os.getenv('SQLITE_TRANSACTION_MODE', 'IMMEDIATE'),
+        # Постоянные соединения: секунды жизни, 0 — закрывать после запроса.
+        'CONN_MAX_AGE': int(os.getenv('CONN_MAX_AGE', 60)),
+        'CONN_HEALTH_CHECKS': os.getenv('CONN_HEALTH_CHECKS', '1') == '1',
+        # Пул нужен серверам, которые создают поток на каждый запрос.
+        'POOL_SIZE': int(os.getenv('DB_POOL_SIZE', 0)),
+        # Тестовая база в файле, а не в памяти, чтобы pytest --reuse-db
+        # не накатывал миграции заново; воркеры xdist добавят суффикс.
+        'TEST': {'NAME': TEST_SQLITE_NAME or ':memory:'},
+    }
+}
+# Копия основной базы для чтения, её обновляет manage.py sync_replica.
+DATABASES['replica'] = {
+    **DATABASES['default'],
+    'NAME': os.getenv('SQLITE_REPLICA_NAME', BASE_DIR / 'db.replica.sqlite3'),
+    # Читатели не должны держать блокировку, которую ждёт копирование.
+    'TRANSACTION_MODE': 'DEFERRED',
+    'TEST': {
+        'NAME': (
+            f'{TEST_SQLITE_NAME}_replica' if TEST_SQLITE_NAME else ':memory:'
+        ),
+    },
+}
+DATABASE_ROUTERS = ['yanews.replica.ReplicaRouter']
+# Страницы чтения берут данные из реплики, см. yanews.replica.
+READ_REPLICA = bool(os.getenv('READ_REPLICA'))
+REPLICA_DATABASE = 'replica'
+REPLICA_APPS = ('news',)
+# Сколько секунд после записи посетитель читает из основной базы.
+REPLICA_PIN_SECONDS = int(os.getenv('REPLICA_PIN_SECONDS', 10))
+
+# LocMemCache годится для одного процесса. С несколькими воркерами нужен
+# общий кэш: в нём сессии и пользователи, см. yanews.auth.
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv(
+            'CACHE_BACKEND',
+            'django.core.cache.backends.locmem.LocMemCache'
+        ),
+        'LOCATION': os.getenv('CACHE_LOCATION', ''),
     }
 }
 
 
+# Сессии сначала читаются из кэша; без обращений к БД вовсе —
+# SESSION_ENGINE=django.contrib.sessions.backends.signed_cookies.
+SESSION_ENGINE = os.getenv(
+    'SESSION_ENGINE', 'django.contrib.sessions.backends.cached_db'
+)
+# Сколько секунд пользователь сессии живёт в кэше, см. yanews.auth.
+AUTH_USER_CACHE_TIMEOUT = int(os.getenv('AUTH_USER_CACHE_TIMEOUT', 60))
+
 AUTH_PASSWORD_VALIDATORS = []
 
 
@@ -80,3 +160,54 @@ LOGIN_URL = reverse_lazy('users:login')
 LOGIN_REDIRECT_URL = reverse_lazy('news:home')
 
 NEWS_COUNT_ON_HOME_PAGE = 10
+
+COMMENTS_PER_PAGE = 50
+
+SEARCH_RESULTS_PER_PAGE = 20
+
+# Файл с дополнительными запрещёнными словами, по одному в строке.
+BAD_WORDS_FILE = os.getenv('BAD_WORDS_FILE')
+
+NEWS_DETAIL_CACHE_TIMEOUT = 300
+
+# Комментарии пишутся пачками из фонового потока, см. news.writebehind.
+COMMENT_WRITE_BEHIND = bool(os.getenv('COMMENT_WRITE_BEHIND'))
+COMMENT_WRITE_BEHIND_BATCH_SIZE = 50
+# Сколько секунд запрос ждёт записи своего комментария.
+COMMENT_WRITE_BEHIND_TIMEOUT = 10
+
+# Под ASGI отдавать страницы чтения асинхронными представлениями,
+# см. yanews.asynchronous.
+ASYNC_VIEWS = bool(os.getenv('ASYNC_VIEWS'))
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'yanews': {
+            'handlers': ['console'],
+            'level': 'INFO',
+        },
+    },
+}
+
+# Учёт SQL-запросов по представлениям, см. yanews.middleware.
+QUERY_PROFILING = bool(os.getenv('QUERY_PROFILING'))
+QUERY_PROFILING_LOG_INTERVAL = 60
+TEMPLATE_PROFILING = bool(os.getenv('TEMPLATE_PROFILING'))
+QUERY_BUDGET_RAISE = DEBUG
+# Бюджеты с запасом на сессию и пользователя, пока их нет в кэше.
+# В тестах бюджеты включены всегда, см. conftest.py.
+QUERY_BUDGETS = {
+    'news:home': 3,
+    'news:search': 3,
+    'news:detail': 8,
+    'news:comments': 2,
+    'news:edit': 5,
+    'news:delete': 8,
+}
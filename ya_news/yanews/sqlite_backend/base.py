@@ -0,0 +1,151 @@
+"""
+SQLite с настройкой соединения под конкурентную запись.
+
+Подключается как ENGINE = 'yanews.sqlite_backend'. Дополнительные ключи
+в настройках базы:
+
+    PRAGMAS — словарь PRAGMA, выполняемых при открытии соединения,
+        например {'journal_mode': 'WAL', 'synchronous': 'NORMAL'};
+    TRANSACTION_MODE — режим BEGIN для transaction.atomic():
+        DEFERRED (как в Django), IMMEDIATE или EXCLUSIVE;
+    CONN_HEALTH_CHECKS — перед первым запросом в каждом HTTP-запросе
+        проверять, что постоянное соединение (CONN_MAX_AGE) живо;
+    POOL_SIZE — сколько закрытых соединений держать открытыми для
+        повторного использования другими потоками, 0 отключает пул.
+"""
+import queue
+import re
+import threading
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db.backends.sqlite3 import base
+
+PRAGMA_NAME = re.compile(r'^[a-z_]+$')
+PRAGMA_VALUE = re.compile(r'^-?\w+$')
+TRANSACTION_MODES = ('DEFERRED', 'IMMEDIATE', 'EXCLUSIVE')
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def apply_pragmas(connection, pragmas):
+    """Выполняет PRAGMA на открытом соединении sqlite3."""
+    for name, value in pragmas.items():
+        if not PRAGMA_NAME.match(name) or not PRAGMA_VALUE.match(str(value)):
+            raise ImproperlyConfigured(f'Недопустимая PRAGMA {name}={value}.')
+        connection.execute(f'PRAGMA {name} = {value}')
+
+
+def ping(connection):
+    """Проверяет, что соединение sqlite3 открыто и отвечает."""
+    try:
+        connection.execute('SELECT 1')
+    except base.Database.Error:
+        return False
+    return True
+
+
+class ConnectionPool:
+    """Потокобезопасный набор свободных соединений sqlite3."""
+
+    def __init__(self, size):
+        self.idle = queue.LifoQueue(maxsize=size)
+
+    def acquire(self):
+        """Возвращает живое свободное соединение или None."""
+        while True:
+            try:
+                connection = self.idle.get_nowait()
+            except queue.Empty:
+                return None
+            if ping(connection):
+                return connection
+            connection.close()
+
+    def release(self, connection):
+        """Возвращает соединение в пул, False — если пул заполнен."""
+        try:
+            self.idle.put_nowait(connection)
+        except queue.Full:
+            return False
+        return True
+
+    def clear(self):
+        while True:
+            try:
+                self.idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+
+def get_pool(settings_dict):
+    """Пул для базы из настроек, один на процесс."""
+    size = settings_dict.get('POOL_SIZE', 0)
+    if not size:
+        return None
+    key = str(settings_dict['NAME'])
+    with _pools_lock:
+        if key not in _pools:
+            _pools[key] = ConnectionPool(size)
+        return _pools[key]
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    health_check_pending = False
+
+    def get_new_connection(self, conn_params):
+        pool = get_pool(self.settings_dict)
+        connection = pool and pool.acquire()
+        if connection is not None:
+            return connection
+        connection = super().get_new_connection(conn_params)
+        apply_pragmas(connection, self.settings_dict.get('PRAGMAS', {}))
+        return connection
+
+    def _close(self):
+        pool = get_pool(self.settings_dict)
+        connection = self.connection
+        if pool is not None and connection is not None and ping(connection):
+            if connection.in_transaction:
+                connection.rollback()
+            if pool.release(connection):
+                return
+        super()._close()
+
+    def is_usable(self):
+        return self.connection is not None and ping(self.connection)
+
+    def close_if_unusable_or_obsolete(self):
+        """
+        Закрывает соединение в начале и конце HTTP-запроса, если пора.
+
+        Сама проверка откладывается до первого запроса к базе: страницы,
+        которые в базу не ходят, не платят за лишний SELECT 1.
+        """
+        super().close_if_unusable_or_obsolete()
+        if self.settings_dict.get('CONN_HEALTH_CHECKS'):
+            self.health_check_pending = self.connection is not None
+
+    def ensure_connection(self):
+        if self.health_check_pending:
+            self.health_check_pending = False
+            if not self.is_usable():
+                self.close()
+        super().ensure_connection()
+
+    def _start_transaction_under_autocommit(self):
+        """
+        Начинает транзакцию в заданном режиме.
+
+        При DEFERRED транзакция, которая сначала читает, а потом пишет,
+        получает «database is locked» без ожидания busy_timeout, если
+        другой писатель успел зафиксировать изменения. IMMEDIATE берёт
+        блокировку записи сразу, и такие транзакции просто встают
+        в очередь.
+        """
+        mode = self.settings_dict.get('TRANSACTION_MODE', 'DEFERRED').upper()
+        if mode not in TRANSACTION_MODES:
+            raise ImproperlyConfigured(
+                f'Неизвестный TRANSACTION_MODE {mode}.'
+            )
+        self.cursor().execute(f'BEGIN {mode}')
@@ -0,0 +1,84 @@
+"""
+Стоимость страницы списка заметок в зависимости от размера блокнота.
+
+Запуск из каталога ya_note:
+    python -m benchmarks.bench_notes_list
+
+Для каждого размера блокнота замеряются первая и последняя страницы
+и число запросов к БД: при keyset-пагинации оба значения не должны
+расти вместе с числом заметок.
+"""
+import os
+import timeit
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yanote.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.contrib.auth import get_user_model  # noqa: E402
+from django.db import connection, reset_queries  # noqa: E402
+from django.test import Client  # noqa: E402
+from django.test.utils import (  # noqa: E402
+    CaptureQueriesContext,
+    setup_databases,
+    setup_test_environment,
+    teardown_databases,
+)
+from django.urls import reverse  # noqa: E402
+
+from notes.models import Note  # noqa: E402
+
+SIZES = (100, 1000, 10000, 100000)
+BATCH_SIZE = 5000
+REPEAT = 5
+
+
+def fill_notebook(author, size):
+    existing = Note.objects.filter(author=author).count()
+    Note.objects.bulk_create(
+        (
+            Note(title=f'Заметка {index}', text='текст ' * 50,
+                 slug=f'{author.pk}-{index}', author=author)
+            for index in range(existing, size)
+        ),
+        batch_size=BATCH_SIZE,
+    )
+
+
+def measure(client, url):
+    # Журнал запросов ограничен по длине, после вставок его нужно очистить.
+    reset_queries()
+    with CaptureQueriesContext(connection) as queries:
+        client.get(url)
+    query_count = len(queries)
+    best = min(timeit.repeat(lambda: client.get(url), number=1, repeat=REPEAT))
+    return best * 1000, query_count
+
+
+def main():
+    setup_test_environment()
+    old_config = setup_databases(verbosity=0, interactive=False)
+    try:
+        author = get_user_model().objects.create(username='bench')
+        client = Client()
+        client.force_login(author)
+        url = reverse('notes:list')
+        print(f'{"заметок":>8} {"первая, мс":>11} {"последняя, мс":>14} '
+              f'{"запросов":>9}')
+        for size in SIZES:
+            fill_notebook(author, size)
+            last_id = Note.objects.filter(
+                author=author
+            ).order_by('-id').values_list('id', flat=True)[50]
+            first_ms, queries = measure(client, url)
+            last_ms, _ = measure(client, f'{url}?after={last_id}')
+            print(f'{size:>8} {first_ms:>11.2f} {last_ms:>14.2f} '
+                  f'{queries:>9}')
+    finally:
+        teardown_databases(old_config, verbosity=0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,42 @@
+from collections import namedtuple
+
+import pytest
+from django.contrib.auth import get_user_model
+from pytils.translit import slugify
+
+from notes.models import Note
+
+TITLE = 'Список покупок на выходные'
+COLLISIONS = (10, 1000, 10000)
+BATCH_SIZE = 5000
+
+Notebook = namedtuple('Notebook', ('author', 'title', 'taken', 'free'))
+
+
+@pytest.fixture(scope='module', params=COLLISIONS,
+                ids=lambda count: f'{count}-taken')
+def taken_slugs(request, django_db_setup, django_db_blocker):
+    """
+    Заметки с одним заголовком: заняты slug base, base-2 ... base-N.
+
+    Данные создаются один раз на модуль и размер.
+    """
+    base = slugify(TITLE)
+    count = request.param
+    with django_db_blocker.unblock():
+        author = get_user_model().objects.create(username='Автор')
+        Note.objects.bulk_create(
+            (
+                Note(
+                    title=TITLE,
+                    text='Текст',
+                    slug=base if number == 1 else f'{base}-{number}',
+                    author=author,
+                )
+                for number in range(1, count + 1)
+            ),
+            batch_size=BATCH_SIZE,
+        )
+    yield Notebook(author, TITLE, base, f'{base}-{count + 1}')
+    with django_db_blocker.unblock():
+        author.delete()
@@ -0,0 +1,49 @@
+"""
+Замеры горячих путей YaNote на pytest-benchmark.
+
+Запуск и сравнение с сохранённой базой — через run_benchmarks.sh
+в корне репозитория.
+"""
+from django.core.exceptions import ValidationError
+from pytils.translit import slugify
+
+from notes.forms import NoteForm
+from notes.models import Note
+
+
+def clean_slug(slug):
+    """clean_slug формы, уже прошедшей проверку поля."""
+    form = NoteForm(data={'title': 'Заметка', 'text': 'Текст', 'slug': slug})
+    form.cleaned_data = {'slug': slug}
+    try:
+        return form.clean_slug()
+    except ValidationError:
+        return None
+
+
+def test_clean_slug_taken(benchmark, taken_slugs, db):
+    assert benchmark(clean_slug, taken_slugs.taken) is None
+
+
+def test_clean_slug_free(benchmark, taken_slugs, db):
+    assert benchmark(clean_slug, taken_slugs.free) == taken_slugs.free
+
+
+def test_note_save_allocates_slug(benchmark, taken_slugs, db):
+    """Каждый раунд сохраняет ещё одну заметку с занятым заголовком."""
+    def save():
+        note = Note(
+            title=taken_slugs.title, text='Текст', author=taken_slugs.author
+        )
+        note.save()
+        return note
+
+    note = benchmark(save)
+    assert note.slug.startswith(taken_slugs.taken)
+    assert Note.objects.filter(slug=taken_slugs.free).exists()
+
+
+def test_slugify_title(benchmark):
+    """Сама транслитерация заголовка максимальной длины."""
+    title = 'Заголовок заметки на кириллице ' * 4
+    assert benchmark(slugify, title[:100])
@@ -4,3 +4,10 @@ from django.apps import AppConfig
 class NotesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'notes'
+
+    def ready(self):
+        from django.core.checks import Tags, register
+
+        from yanote.auth import check_shared_cache
+
+        register(check_shared_cache, Tags.caches, deploy=True)
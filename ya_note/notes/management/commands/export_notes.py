@@ -0,0 +1,35 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from notes.models import Note
+from notes.transfer import FORMATS, detect_format, open_stream, write_records
+
+FIELDS = ('title', 'text', 'slug', 'author__username')
+HEADER = ('title', 'text', 'slug', 'author')
+
+
+class Command(BaseCommand):
+    help = 'Выгружает заметки в JSON Lines или CSV, не держа их в памяти.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="Путь к файлу или '-' для stdout.")
+        parser.add_argument('--format', choices=FORMATS)
+        parser.add_argument('--author', help='Только заметки этого автора.')
+        parser.add_argument('--chunk-size', type=int, default=2000)
+
+    def handle(self, path, **options):
+        fmt = detect_format(path, options['format'])
+        started = time.monotonic()
+        notes = Note.objects.order_by('id')
+        if options['author']:
+            notes = notes.filter(author__username=options['author'])
+        rows = notes.values_list(*FIELDS).iterator(
+            chunk_size=options['chunk_size']
+        )
+        with open_stream(path, 'w') as file:
+            total = write_records(file, HEADER, rows, fmt)
+        self.stderr.write(self.style.SUCCESS(
+            f'Выгружено заметок: {total} '
+            f'за {time.monotonic() - started:.1f} с'
+        ))
@@ -0,0 +1,80 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from notes.models import Note
+from notes.slugs import SlugAllocator
+from notes.transfer import (
+    FORMATS, batched, detect_format, open_stream, read_records
+)
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        'Загружает заметки из файла JSON Lines или CSV с полями '
+        'title, text, author (имя пользователя) и необязательным slug.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="Путь к файлу или '-' для stdin.")
+        parser.add_argument('--format', choices=FORMATS)
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def load_authors(self, batch):
+        """Догружает авторов пачки одним запросом."""
+        missing = {
+            record.get('author') for _, record in batch
+        } - self.authors.keys()
+        self.authors.update(
+            User.objects.filter(
+                username__in=missing
+            ).values_list('username', 'id')
+        )
+
+    def build_note(self, number, record):
+        try:
+            title, text = record['title'], record['text']
+            author_id = self.authors[record['author']]
+        except KeyError as error:
+            raise CommandError(
+                f'Строка {number}: нет поля или автора {error}.'
+            )
+        slug = record.get('slug')
+        if not slug:
+            slug = self.slugs.allocate(title)
+        elif not self.slugs.reserve(slug):
+            raise CommandError(f'Строка {number}: slug {slug} уже занят.')
+        return Note(title=title, text=text, slug=slug, author_id=author_id)
+
+    def handle(self, path, **options):
+        fmt = detect_format(path, options['format'])
+        self.authors = {}
+        # Все занятые slug загружаются одним запросом,
+        # дальше свободные варианты подбираются в памяти.
+        self.slugs = SlugAllocator(
+            Note.objects.all(),
+            Note._meta.get_field('slug').max_length,
+            preload=True
+        )
+        started = time.monotonic()
+        total = 0
+        with open_stream(path, 'r') as file:
+            records = enumerate(read_records(file, fmt), start=1)
+            for batch in batched(records, options['batch_size']):
+                self.load_authors(batch)
+                notes = [self.build_note(*record) for record in batch]
+                with transaction.atomic():
+                    Note.objects.bulk_create(notes)
+                total += len(notes)
+                elapsed = time.monotonic() - started
+                self.stderr.write(
+                    f'Загружено {total}, {total / elapsed:.0f} строк/с'
+                )
+        self.stdout.write(self.style.SUCCESS(
+            f'Загружено заметок: {total} '
+            f'за {time.monotonic() - started:.1f} с'
+        ))
@@ -0,0 +1,68 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from notes.models import Note
+from notes.seeding import paragraph, seed_users, sentence, zipf_choices
+from notes.slugs import SlugAllocator
+from notes.transfer import batched
+
+
+class Command(BaseCommand):
+    help = (
+        'Заполняет базу пользователями и заметками для нагрузочного '
+        'тестирования. Число заметок у авторов распределено по Ципфу.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=100)
+        parser.add_argument('--notes', type=int, default=10000)
+        parser.add_argument('--prefix', default='load',
+                            help='Пользователи будут prefix1..prefixN.')
+        parser.add_argument('--password', default='load-password')
+        parser.add_argument('--exponent', type=float, default=1.1,
+                            help='Показатель закона Ципфа.')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def generate_notes(self, rng, count, user_ids, exponent):
+        slugs = SlugAllocator(
+            Note.objects.all(),
+            Note._meta.get_field('slug').max_length,
+            preload=True
+        )
+        for author_id in zipf_choices(rng, user_ids, count, exponent):
+            title = sentence(rng, 1, 4)[:100]
+            yield Note(
+                title=title,
+                text=paragraph(rng),
+                slug=slugs.allocate(title),
+                author_id=author_id,
+            )
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        batch_size = options['batch_size']
+        started = time.monotonic()
+        user_ids = seed_users(
+            options['users'], options['prefix'], options['password'],
+            batch_size
+        )
+        total = 0
+        notes = self.generate_notes(
+            rng, options['notes'], user_ids, options['exponent']
+        )
+        for batch in batched(notes, batch_size):
+            with transaction.atomic():
+                Note.objects.bulk_create(batch)
+            total += len(batch)
+            elapsed = time.monotonic() - started
+            self.stderr.write(
+                f'Заметки: {total}, {total / elapsed:.0f} строк/с'
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f'Пользователей: {len(user_ids)}, заметок: {total} '
+            f'за {time.monotonic() - started:.1f} с'
+        ))
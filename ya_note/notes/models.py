@@ -1,7 +1,9 @@
 from django.conf import settings
-from django.db import models
+from django.db import IntegrityError, models, transaction
 
-from pytils.translit import slugify
+from .slugs import SlugAllocator
+
+SLUG_ATTEMPTS = 5
 
 
 class Note(models.Model):
@@ -27,12 +29,38 @@ class Note(models.Model):
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE,
     )
+    updated = models.DateTimeField('Изменена', auto_now=True)
+
+    class Meta:
+        indexes = (
+            models.Index(fields=('author', 'id'), name='note_author_id_idx'),
+        )
 
     def __str__(self):
         return self.title
 
     def save(self, *args, **kwargs):
-        if not self.slug:
-            max_slug_length = self._meta.get_field('slug').max_length
-            self.slug = slugify(self.title)[:max_slug_length]
-        super().save(*args, **kwargs)
+        """
+        Сохраняет заметку, при необходимости подбирая slug.
+
+        Если между подбором и вставкой такой slug успел занять
+        параллельный запрос, вставка повторяется в точке сохранения
+        со следующим свободным вариантом.
+        """
+        if self.slug:
+            return super().save(*args, **kwargs)
+        others = Note.objects.all()
+        if self.pk:
+            others = others.exclude(pk=self.pk)
+        allocator = SlugAllocator(
+            others, self._meta.get_field('slug').max_length
+        )
+        for attempt in range(SLUG_ATTEMPTS):
+            self.slug = allocator.allocate(self.title)
+            try:
+                with transaction.atomic():
+                    return super().save(*args, **kwargs)
+            except IntegrityError:
+                if attempt == SLUG_ATTEMPTS - 1:
+                    self.slug = ''
+                    raise
@@ -0,0 +1,84 @@
+"""Полнотекстовый поиск по заметкам через SQLite FTS5."""
+import re
+
+from django.db import connection
+from django.utils.functional import cached_property
+
+from .models import Note
+
+FTS_TABLE = 'notes_note_fts'
+# Веса bm25 для колонок title и text: совпадение в заголовке важнее.
+BM25_WEIGHTS = (10.0, 1.0)
+
+
+def fts_query(text):
+    """
+    Превращает строку пользователя в запрос FTS5.
+
+    Каждое слово берётся в кавычки и ищется как префикс,
+    поэтому синтаксис FTS5 во вводе не приводит к ошибкам.
+    """
+    return ' '.join(f'"{word}"*' for word in re.findall(r'\w+', text))
+
+
+def rebuild_index():
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')"
+        )
+
+
+class SearchResults:
+    """
+    Заметки автора, найденные по запросу, в порядке bm25.
+
+    Поддерживает count() и срезы, поэтому подходит для Paginator:
+    из индекса выбираются только id одной страницы.
+    """
+
+    model = Note
+    base_sql = (
+        f'FROM {FTS_TABLE} JOIN notes_note ON notes_note.id = '
+        f'{FTS_TABLE}.rowid WHERE {FTS_TABLE} MATCH %s '
+        'AND notes_note.author_id = %s'
+    )
+
+    def __init__(self, text, author):
+        self.match = fts_query(text)
+        self.author = author
+
+    def _execute(self, sql, params):
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            return cursor.fetchall()
+
+    @cached_property
+    def _count(self):
+        if not self.match:
+            return 0
+        (count,), = self._execute(
+            f'SELECT COUNT(*) {self.base_sql}', (self.match, self.author.pk)
+        )
+        return count
+
+    def count(self):
+        return self._count
+
+    def __len__(self):
+        return self._count
+
+    def __getitem__(self, page):
+        if not isinstance(page, slice) or page.step:
+            raise TypeError('Результаты поиска поддерживают только срезы.')
+        if not self.match:
+            return []
+        start = page.start or 0
+        limit = -1 if page.stop is None else max(page.stop - start, 0)
+        rows = self._execute(
+            f'SELECT notes_note.id {self.base_sql} '
+            f'ORDER BY bm25({FTS_TABLE}, %s, %s) LIMIT %s OFFSET %s',
+            (self.match, self.author.pk, *BM25_WEIGHTS, limit, start)
+        )
+        ids = [pk for pk, in rows]
+        notes = self.model.objects.only('id', 'slug', 'title').in_bulk(ids)
+        return [notes[pk] for pk in ids if pk in notes]
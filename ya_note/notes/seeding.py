@@ -0,0 +1,76 @@
+"""
+Генераторы правдоподобных данных для нагрузочного тестирования.
+
+Активность в жизни распределена по закону Ципфа: немногие активные
+пользователи ведут большую часть заметок, а у длинного хвоста
+остальных их единицы.
+"""
+import itertools
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+
+WORDS = (
+    'купить', 'молоко', 'хлеб', 'позвонить', 'маме', 'встреча', 'отчёт',
+    'проект', 'идея', 'книга', 'прочитать', 'фильм', 'рецепт', 'пирог',
+    'список', 'дела', 'работа', 'дом', 'отпуск', 'билеты', 'врач', 'запись',
+    'подарок', 'день', 'рождения', 'оплатить', 'счёт', 'спорт', 'бег',
+    'английский', 'урок', 'план', 'неделя', 'задача', 'заметка', 'пароль',
+)
+
+
+def zipf_weights(count, exponent=1.1):
+    """Веса рангов 1..count: вес ранга k пропорционален 1 / k ** exponent."""
+    return [1 / rank ** exponent for rank in range(1, count + 1)]
+
+
+def zipf_choices(rng, population, count, exponent=1.1):
+    """Выбирает count элементов population по закону Ципфа по порядку."""
+    cum_weights = list(
+        itertools.accumulate(zipf_weights(len(population), exponent))
+    )
+    return rng.choices(population, cum_weights=cum_weights, k=count)
+
+
+def sentence(rng, min_words=3, max_words=12):
+    words = rng.choices(WORDS, k=rng.randint(min_words, max_words))
+    return ' '.join(words).capitalize() + '.'
+
+
+def paragraph(rng, min_sentences=1, max_sentences=6):
+    return ' '.join(
+        sentence(rng)
+        for _ in range(rng.randint(min_sentences, max_sentences))
+    )
+
+
+def seed_users(count, prefix, password, batch_size):
+    """
+    Создаёт пользователей prefix1..prefixN с общим паролем.
+
+    Хэш пароля считается один раз: PBKDF2 на каждого пользователя
+    занял бы больше времени, чем вся остальная вставка. Уже
+    существующие пользователи пропускаются, возвращаются id всех.
+    """
+    User = get_user_model()
+    usernames = [f'{prefix}{number}' for number in range(1, count + 1)]
+    existing = dict(
+        User.objects.filter(
+            username__startswith=prefix
+        ).values_list('username', 'id')
+    )
+    password_hash = make_password(password)
+    User.objects.bulk_create(
+        (
+            User(username=username, password=password_hash)
+            for username in usernames
+            if username not in existing
+        ),
+        batch_size=batch_size,
+    )
+    ids = dict(
+        User.objects.filter(
+            username__startswith=prefix
+        ).values_list('username', 'id')
+    )
+    return [ids[username] for username in usernames]
@@ -0,0 +1,80 @@
+"""Подбор свободного slug для заметок."""
+from django.db.models import Q
+from pytils.translit import slugify
+
+# Сколько символов оставить под суффикс вида -N.
+SUFFIX_RESERVE = 11
+DEFAULT_BASE = 'note'
+
+
+class SlugAllocator:
+    """
+    Подбирает свободный slug вида base, base-2, base-3 и так далее.
+
+    Все занятые варианты для основы выбираются одним запросом,
+    дальше перебор идёт в памяти. Выданные slug запоминаются,
+    поэтому один распределитель можно использовать для пачки заметок.
+    С preload=True все существующие slug загружаются заранее
+    одним запросом, что удобно для массового импорта.
+    """
+
+    def __init__(self, queryset, max_length, preload=False):
+        self.queryset = queryset
+        self.max_length = max_length
+        self.taken = set()
+        self.loaded_bases = set()
+        self.next_numbers = {}
+        self.preloaded = preload
+        if preload:
+            self.taken.update(
+                queryset.values_list('slug', flat=True).iterator()
+            )
+
+    def make_base(self, title):
+        return slugify(title)[:self.max_length] or DEFAULT_BASE
+
+    def candidate_prefixes(self, base):
+        """Начала вариантов с суффиксом: base, укороченная под -N."""
+        return {
+            base[:self.max_length - 1 - digits]
+            for digits in range(1, SUFFIX_RESERVE)
+        }
+
+    def load(self, base):
+        """
+        Загружает занятые варианты base: её саму и prefix-<цифра>...
+
+        Каждое начало — диапазон по уникальному индексу slug, поэтому
+        slug вроде note-taking для основы note не читаются.
+        """
+        if self.preloaded or base in self.loaded_bases:
+            return
+        query = Q(slug=base)
+        for prefix in self.candidate_prefixes(base):
+            query |= Q(slug__gte=f'{prefix}-0', slug__lt=f'{prefix}-:')
+        self.taken.update(
+            self.queryset.filter(query).values_list('slug', flat=True)
+        )
+        self.loaded_bases.add(base)
+
+    def allocate(self, title):
+        """Возвращает свободный slug для заголовка и резервирует его."""
+        base = self.make_base(title)
+        self.load(base)
+        candidate = base
+        number = self.next_numbers.get(base, 1)
+        while candidate in self.taken:
+            number += 1
+            suffix = f'-{number}'
+            candidate = base[:self.max_length - len(suffix)] + suffix
+        self.next_numbers[base] = number
+        self.taken.add(candidate)
+        return candidate
+
+    def reserve(self, slug):
+        """Резервирует готовый slug, False если он уже занят."""
+        self.load(slug)
+        if slug in self.taken:
+            return False
+        self.taken.add(slug)
+        return True
@@ -0,0 +1,76 @@
+import json
+import tempfile
+from io import StringIO
+from pathlib import Path
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+
+from notes.models import Note
+from .test_fixtures import BaseTestSetUp
+
+
+class TestImportExport(BaseTestSetUp):
+    """Класс тестов загрузки и выгрузки заметок."""
+
+    def setUp(self):
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self.temp_dir = Path(temp_dir.name)
+
+    def run_command(self, command, *args, **options):
+        call_command(command, *args, stdout=StringIO(), stderr=StringIO(),
+                     **options)
+
+    def write_jsonl(self, records):
+        path = self.temp_dir / 'notes.jsonl'
+        path.write_text(
+            ''.join(json.dumps(record) + '\n' for record in records),
+            encoding='utf-8'
+        )
+        return path
+
+    def test_import_allocates_slugs_in_bulk(self):
+        """Тест, заметки без slug получают свободные варианты."""
+        path = self.write_jsonl(
+            {'title': self.notes.title, 'text': 'т', 'author': 'Reader'}
+            for _ in range(3)
+        )
+        # Все slug и авторы пачки, затем по вставке на пачку
+        # в точке сохранения. Запросов на отдельную строку нет.
+        with self.assertNumQueries(8):
+            self.run_command('import_notes', str(path), batch_size=2)
+        self.assertEqual(
+            list(Note.objects.filter(author=self.user).values_list(
+                'slug', flat=True
+            ).order_by('id')),
+            [f'{self.notes.slug}-{number}' for number in (2, 3, 4)]
+        )
+
+    def test_import_rejects_unknown_author_and_taken_slug(self):
+        """Тест, неизвестный автор и занятый slug останавливают загрузку."""
+        bad_records = (
+            {'title': 'т', 'text': 'т', 'author': 'Nobody'},
+            {'title': 'т', 'text': 'т', 'author': 'Author',
+             'slug': self.notes.slug},
+        )
+        for record in bad_records:
+            with self.subTest(record=record):
+                path = self.write_jsonl([record])
+                with self.assertRaises(CommandError):
+                    self.run_command('import_notes', str(path))
+        self.assertEqual(Note.objects.count(), 1)
+
+    def test_export_import_round_trip(self):
+        """Тест, выгруженные заметки загружаются обратно без потерь."""
+        fields = ('title', 'text', 'slug', 'author')
+        before = list(Note.objects.values_list(*fields))
+        for file_name in ('notes.jsonl', 'notes.csv'):
+            with self.subTest(file_name=file_name):
+                path = self.temp_dir / file_name
+                self.run_command('export_notes', str(path), author='Author')
+                Note.objects.all().delete()
+                self.run_command('import_notes', str(path))
+                self.assertEqual(
+                    list(Note.objects.values_list(*fields)), before
+                )
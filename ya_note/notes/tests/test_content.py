@@ -1,7 +1,22 @@
+import asyncio
+import csv
+import json
+from http import HTTPStatus
+
+from asgiref.sync import async_to_sync
 from django.contrib.auth import get_user_model
+from django.test import (
+    RequestFactory,
+    TransactionTestCase,
+    override_settings,
+)
+from django.urls import reverse
 
 from notes.forms import NoteForm
-from .test_fixtures import BaseTestSetUp
+from notes.models import Note
+from notes.views import NoteDetail, NotesList
+from yanote.asynchronous import StreamingASGIHandler, read_view
+from .test_fixtures import BaseTestSetUp, enforce_query_budgets
 
 
 User = get_user_model()
@@ -40,3 +55,202 @@ class TestHomePage(BaseTestSetUp):
                     NoteForm,
                     'Форма не является экземпляром NoteForm.'
                 )
+
+
+@override_settings(NOTES_PER_PAGE=2)
+class TestNotesListPages(BaseTestSetUp):
+    """Класс тестов постраничного списка заметок."""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        Note.objects.bulk_create(
+            Note(title=f'Заметка {index}', text='текст',
+                 slug=f'note-{index}', author=cls.author)
+            for index in range(4)
+        )
+
+    def test_pages_cover_all_notes(self):
+        """Тест, страницы по курсору покрывают все заметки по порядку."""
+        url = self.urls['list']
+        seen = []
+        while url:
+            response = self.author_client.get(url)
+            seen.extend(response.context['object_list'])
+            cursor = response.context['next_cursor']
+            url = f"{self.urls['list']}?after={cursor}" if cursor else None
+        self.assertEqual(
+            seen, list(Note.objects.filter(author=self.author).order_by('id'))
+        )
+
+    def test_list_loads_only_rendered_fields(self):
+        """Тест, текст заметок в список не загружается."""
+        response = self.author_client.get(self.urls['list'])
+        for note in response.context['object_list']:
+            self.assertEqual(
+                note.get_deferred_fields(), {'text', 'author_id', 'updated'}
+            )
+
+    def test_bad_cursor(self):
+        """Тест, испорченный курсор даёт 404."""
+        response = self.author_client.get(self.urls['list'] + '?after=x')
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+
+
+class TestNoteSearch(BaseTestSetUp):
+    """Класс тестов поиска по заметкам."""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.in_text = Note.objects.create(
+            title='Покупки', text='Купить молоко и хлеб', author=cls.author
+        )
+        cls.in_title = Note.objects.create(
+            title='Молоко', text='Проверить срок годности', author=cls.author
+        )
+        cls.foreign = Note.objects.create(
+            title='Молоко', text='Чужая заметка', author=cls.user
+        )
+        cls.search_url = reverse('notes:search')
+
+    def search(self, query, **params):
+        response = self.author_client.get(
+            self.search_url, {'q': query, **params}
+        )
+        return list(response.context['object_list'])
+
+    def test_search_ranks_and_filters_author(self):
+        """Тест, поиск ранжирует по bm25 и не видит чужие заметки."""
+        self.assertEqual(self.search('молок'), [self.in_title, self.in_text])
+
+    def test_search_is_paginated(self):
+        """Тест, результаты поиска разбиты на страницы."""
+        with override_settings(SEARCH_RESULTS_PER_PAGE=1):
+            self.assertEqual(self.search('молоко', page=2), [self.in_text])
+
+    def test_search_follows_changes(self):
+        """Тест, индекс следует за изменением и удалением заметок."""
+        self.in_text.text = 'Купить кефир'
+        self.in_text.save()
+        self.assertEqual(self.search('кефир'), [self.in_text])
+        self.assertEqual(self.search('молоко'), [self.in_title])
+        self.in_text.delete()
+        self.assertEqual(self.search('кефир'), [])
+
+    def test_search_anonymous_redirect(self):
+        """Тест, аноним отправляется на страницу логина."""
+        response = self.client.get(self.search_url)
+        self.assertEqual(response.status_code, HTTPStatus.FOUND)
+
+
+class TestNotesExport(BaseTestSetUp):
+    """Класс тестов выгрузки заметок."""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        Note.objects.create(
+            title='Чужая', text='Не выгружается', slug='foreign',
+            author=cls.user
+        )
+        cls.export_url = reverse('notes:export')
+
+    def export(self, export_format):
+        response = self.author_client.get(
+            self.export_url, {'format': export_format}
+        )
+        self.assertTrue(response.streaming)
+        return b''.join(response.streaming_content).decode()
+
+    def test_export_csv(self):
+        """Тест, CSV содержит только заметки пользователя."""
+        rows = list(csv.reader(self.export('csv').splitlines()))
+        self.assertEqual(rows, [
+            ['title', 'text', 'slug'],
+            [self.notes.title, self.notes.text, self.notes.slug],
+        ])
+
+    def test_export_ndjson(self):
+        """Тест, NDJSON содержит по объекту на строку."""
+        lines = self.export('ndjson').splitlines()
+        self.assertEqual([json.loads(line) for line in lines], [{
+            'title': self.notes.title,
+            'text': self.notes.text,
+            'slug': self.notes.slug,
+        }])
+
+    def test_export_unknown_format(self):
+        """Тест, неизвестный формат даёт 404."""
+        response = self.author_client.get(self.export_url, {'format': 'xml'})
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+
+
+@enforce_query_budgets
+@override_settings(ASYNC_VIEWS=True)
+class TestAsyncViews(TransactionTestCase):
+    """Класс тестов асинхронных вариантов страниц чтения."""
+
+    def setUp(self):
+        self.author = User.objects.create(username='Author')
+        self.note = Note.objects.create(
+            title='Название заметки', text='Подробности', slug='zametka',
+            author=self.author
+        )
+
+    def test_async_view_matches_sync(self):
+        """Тест, асинхронный вариант отдаёт ту же страницу, что и обычный."""
+        cases = (
+            (NotesList, {}),
+            (NoteDetail, {'slug': self.note.slug}),
+        )
+        for view_class, kwargs in cases:
+            with self.subTest(view=view_class.__name__):
+                async_view = read_view(view_class)
+                self.assertTrue(asyncio.iscoroutinefunction(async_view))
+                request = RequestFactory().get('/')
+                request.user = self.author
+                expected = view_class.as_view()(request, **kwargs).render()
+                response = async_to_sync(async_view)(request, **kwargs)
+                self.assertEqual(response.status_code, HTTPStatus.OK)
+                self.assertEqual(response.content, expected.content)
+
+    @override_settings(NOTES_EXPORT_CHUNK_SIZE=1)
+    def test_export_streams_under_asgi(self):
+        """Тест, под ASGI выгрузка идёт потоком, порция за порцией."""
+        Note.objects.create(
+            title='Вторая', text='Ещё', slug='vtoraya', author=self.author
+        )
+        self.client.force_login(self.author)
+        session = self.client.cookies['sessionid'].value
+        scope = {
+            'type': 'http',
+            'method': 'GET',
+            'path': reverse('notes:export'),
+            'query_string': b'format=csv',
+            'headers': [
+                (b'host', b'testserver'),
+                (b'cookie', f'sessionid={session}'.encode()),
+            ],
+        }
+        messages = []
+
+        async def receive():
+            return {'type': 'http.request', 'body': b''}
+
+        async def send(message):
+            messages.append(message)
+
+        async_to_sync(StreamingASGIHandler())(scope, receive, send)
+        self.assertEqual(messages[0]['status'], HTTPStatus.OK)
+        parts = [
+            message['body'] for message in messages[1:] if message.get('body')
+        ]
+        # Заголовок и по порции на каждую из двух заметок.
+        self.assertEqual(len(parts), 3)
+        rows = list(csv.reader(b''.join(parts).decode().splitlines()))
+        self.assertEqual(rows, [
+            ['title', 'text', 'slug'],
+            [self.note.title, self.note.text, self.note.slug],
+            ['Вторая', 'Ещё', 'vtoraya'],
+        ])
@@ -1,5 +1,5 @@
 from django.contrib.auth.models import User
-from django.test import TestCase
+from django.test import TestCase, override_settings
 from django.urls import reverse
 from django.utils.text import slugify
 from django.test import Client
@@ -7,6 +7,13 @@ from django.test import Client
 from notes.models import Note
 
 
+# Превышение бюджета запросов из QUERY_BUDGETS роняет тест.
+enforce_query_budgets = override_settings(
+    QUERY_PROFILING=True, QUERY_BUDGET_RAISE=True
+)
+
+
+@enforce_query_budgets
 class BaseTestSetUp(TestCase):
     """Базовая фикстура для всех тестов."""
     NOTE_TEXT = 'текст'
@@ -1,8 +1,12 @@
 from http import HTTPStatus
+from unittest import mock
 
 from django.contrib.auth import get_user_model
+from pytils.translit import slugify
 
+from notes.forms import WARNING, NoteForm
 from notes.models import Note
+from notes.slugs import SlugAllocator
 from .test_fixtures import BaseTestSetUp
 
 User = get_user_model()
@@ -78,3 +82,80 @@ class TestNoteEditDelete(BaseTestSetUp):
         self.assertEqual(updated_note.author, self.notes.author)
         self.assertEqual(updated_note.title, self.notes.title)
         self.assertEqual(updated_note.slug, self.notes.slug)
+
+
+class TestSlugAllocation(BaseTestSetUp):
+    """Класс тестов подбора slug."""
+
+    def create_without_slug(self):
+        form_data = {**self.form_data, 'slug': ''}
+        response = self.author_client.post(self.urls['add'], data=form_data)
+        self.assertRedirects(response, self.urls['success'])
+        return Note.objects.latest('id')
+
+    def test_empty_slug_gets_free_suffix(self):
+        """Тест, одинаковые заголовки получают slug с суффиксом."""
+        base = slugify(self.form_data['title'])
+        slugs = [self.create_without_slug().slug for _ in range(3)]
+        self.assertEqual(slugs, [base, f'{base}-2', f'{base}-3'])
+
+    def test_allocator_one_query_per_base(self):
+        """Тест, занятые варианты выбираются одним запросом."""
+        Note.objects.bulk_create(
+            Note(title='t', text='t', slug=f'title-{number}',
+                 author=self.author)
+            for number in range(2, 50)
+        )
+        Note.objects.create(
+            title='t', text='t', slug='title', author=self.author
+        )
+        allocator = SlugAllocator(Note.objects.all(), max_length=100)
+        with self.assertNumQueries(1):
+            slugs = [allocator.allocate('title') for _ in range(3)]
+        self.assertEqual(slugs, ['title-50', 'title-51', 'title-52'])
+
+    def test_allocator_loads_only_numbered_variants(self):
+        """Тест, slug с тем же началом без числового суффикса не читаются."""
+        Note.objects.bulk_create(
+            Note(title='t', text='t', slug=slug, author=self.author)
+            for slug in (
+                'title-taking', 'title-taking-2', 'titles', 'title-3',
+                'abcdefgh-2',
+            )
+        )
+        allocator = SlugAllocator(Note.objects.all(), max_length=10)
+        allocator.load('title')
+        allocator.load('abcdefghij')
+        self.assertEqual(allocator.taken, {'title-3', 'abcdefgh-2'})
+        self.assertEqual(allocator.allocate('abcdefghijkl'), 'abcdefghij')
+        self.assertEqual(allocator.allocate('abcdefghijkl'), 'abcdefgh-3')
+
+    def test_save_retries_taken_slug(self):
+        """Тест, занятый параллельно slug не роняет сохранение."""
+        allocate = SlugAllocator.allocate
+        calls = []
+
+        def racing_allocate(allocator, title):
+            calls.append(title)
+            if len(calls) == 1:
+                return self.notes.slug
+            return allocate(allocator, title)
+
+        with mock.patch.object(SlugAllocator, 'allocate', racing_allocate):
+            note = Note.objects.create(
+                title=self.notes.title, text='текст', author=self.user
+            )
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(note.slug, f'{self.notes.slug}-2')
+
+    def test_slug_race_in_form_is_not_500(self):
+        """Тест, гонка за явный slug возвращает ошибку формы."""
+        form_data = {**self.form_data, 'slug': self.notes.slug}
+        with mock.patch.object(
+                NoteForm, 'clean_slug', lambda form: self.notes.slug
+        ):
+            response = self.user_client.post(self.urls['add'], form_data)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertIn(
+            self.notes.slug + WARNING, response.context['form'].errors['slug']
+        )
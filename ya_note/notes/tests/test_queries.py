@@ -0,0 +1,228 @@
+import asyncio
+from http import HTTPStatus
+from io import StringIO
+
+from asgiref.sync import async_to_sync
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.exceptions import MiddlewareNotUsed
+from django.core.management import call_command
+from django.db import connection
+from django.http import HttpResponse
+from django.test import (
+    Client,
+    RequestFactory,
+    TransactionTestCase,
+    override_settings,
+)
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from notes.models import Note
+from notes.views import NoteDetail, NotesList
+from yanote.auth import check_shared_cache
+from yanote.middleware import QueryBudgetExceeded, TemplateRenders
+from yanote.replica import PIN_COOKIE, ReplicaMiddleware, read_database
+from .test_fixtures import BaseTestSetUp, enforce_query_budgets
+
+
+class TestQueryPlans(BaseTestSetUp):
+    """Класс тестов планов запросов."""
+
+    def query_plan(self, queryset):
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+            return [row[-1] for row in cursor.fetchall()]
+
+    def assert_uses_index(self, queryset):
+        plan = self.query_plan(queryset)
+        for step in plan:
+            with self.subTest(step=step):
+                self.assertFalse(
+                    step.startswith(('SCAN', 'SEARCH'))
+                    and 'USING' not in step,
+                    f'Запрос читает таблицу без индекса: {plan}'
+                )
+                self.assertNotIn(
+                    'TEMP B-TREE',
+                    step,
+                    f'Запрос сортирует результат без индекса: {plan}'
+                )
+
+    def get_view(self, view_class):
+        view = view_class()
+        view.request = RequestFactory().get('/')
+        view.request.user = self.author
+        return view
+
+    def test_notes_list_uses_index(self):
+        """Тест, список заметок автора выбирается по индексу."""
+        self.assert_uses_index(self.get_view(NotesList).get_queryset())
+
+    def test_note_detail_uses_index(self):
+        """Тест, заметка по slug выбирается по индексу."""
+        queryset = self.get_view(NoteDetail).get_queryset()
+        self.assert_uses_index(queryset.filter(slug=self.notes.slug))
+
+
+class TestQueryBudget(BaseTestSetUp):
+    """Класс тестов бюджета запросов."""
+
+    def test_views_fit_budget(self):
+        """Тест, страницы заметок укладываются в бюджет запросов."""
+        for name, url in self.urls.items():
+            with self.subTest(name=name):
+                response = self.author_client.get(url)
+                self.assertIn('X-Query-Count', response)
+        response = self.author_client.post(self.urls['add'], data={
+            'title': 'Новая', 'text': self.NOTE_TEXT, 'slug': 'new'
+        })
+        self.assertIn('X-Query-Count', response)
+
+    def test_budget_exceeded(self):
+        """Тест, превышение бюджета останавливает запрос."""
+        with override_settings(QUERY_BUDGETS={'notes:list': 1}):
+            with self.assertRaises(QueryBudgetExceeded):
+                self.author_client.get(self.urls['list'])
+
+
+class TestCachedAuth(BaseTestSetUp):
+    """Класс тестов сессии и пользователя из кэша."""
+
+    def test_warm_request_skips_session_and_user(self):
+        """Тест, повторный запрос не читает сессию и пользователя из БД."""
+        cache.clear()
+        self.author_client.get(self.urls['list'])
+        with CaptureQueriesContext(connection) as queries:
+            response = self.author_client.get(self.urls['list'])
+        self.assertEqual(response.context['user'], self.author)
+        sql = ' '.join(query['sql'] for query in queries)
+        self.assertNotIn('django_session', sql)
+        self.assertNotIn('auth_user', sql)
+
+    def test_password_change_ends_session(self):
+        """Тест, после смены пароля закэшированный пользователь не входит."""
+        self.author_client.get(self.urls['list'])
+        self.author.set_password('new-password')
+        self.author.save()
+        response = self.author_client.get(self.urls['list'])
+        self.assertEqual(response.status_code, HTTPStatus.FOUND)
+
+    def test_shared_cache_check(self):
+        """Тест, проверка --deploy предупреждает о кэше одного процесса."""
+        self.assertEqual(
+            [message.id for message in check_shared_cache(None)],
+            ['yanote.W001']
+        )
+        with override_settings(CACHES={'default': {
+            'BACKEND': 'django.core.cache.backends.memcached.PyMemcacheCache',
+        }}):
+            self.assertEqual(check_shared_cache(None), [])
+
+
+class TestTemplateProfile(BaseTestSetUp):
+    """Класс тестов профиля отрисовки шаблонов."""
+
+    def test_profile_covers_includes(self):
+        """Тест, профиль видит страницу, её родителя и include."""
+        with TemplateRenders().profile() as renders:
+            self.author_client.get(self.urls['list'])
+        self.assertLessEqual(
+            {'notes/list.html', 'base.html', 'includes/header.html'},
+            set(renders.templates)
+        )
+        self.assertGreater(renders.duration, 0)
+
+    @override_settings(TEMPLATE_PROFILING=True)
+    def test_profiling_headers(self):
+        """Тест, итоги отрисовки отдаются в заголовках ответа."""
+        response = self.author_client.get(self.urls['detail'])
+        self.assertTrue(response['X-Template-Time'].endswith('ms'))
+        self.assertEqual(response['X-Template-Queries'], '0')
+
+
+class TestConditionalGet(BaseTestSetUp):
+    """Класс тестов условных запросов к заметке."""
+
+    def test_not_modified(self):
+        """Тест, неизменившаяся заметка отдаётся как 304."""
+        etag = self.author_client.get(self.urls['detail'])['ETag']
+        # Сессия и пользователь уже в кэше, остаётся строка заметки.
+        with self.assertNumQueries(1):
+            response = self.author_client.get(
+                self.urls['detail'], HTTP_IF_NONE_MATCH=etag
+            )
+        self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
+
+    def test_edit_changes_etag(self):
+        """Тест, правка заметки меняет ETag, а Last-Modified не отдаётся."""
+        response = self.author_client.get(self.urls['detail'])
+        self.author_client.post(self.urls['edit'], data=self.form_data)
+        detail_url = reverse('notes:detail', args=(self.form_data['slug'],))
+        new_response = self.author_client.get(
+            detail_url, HTTP_IF_NONE_MATCH=response['ETag']
+        )
+        self.assertEqual(new_response.status_code, HTTPStatus.OK)
+        self.assertNotEqual(new_response['ETag'], response['ETag'])
+        self.assertNotIn('Last-Modified', new_response)
+
+
+@enforce_query_budgets
+@override_settings(READ_REPLICA=True)
+class TestReplicaRouting(TransactionTestCase):
+    """Класс тестов чтения списка заметок из реплики."""
+
+    databases = {'default', 'replica'}
+
+    def setUp(self):
+        self.author = get_user_model().objects.create(username='Author')
+        self.client = Client()
+        self.client.force_login(self.author)
+        self.synced = Note.objects.create(
+            title='Из реплики', text='Текст', slug='replica',
+            author=self.author
+        )
+        call_command('sync_replica', stdout=StringIO())
+        self.list_url = reverse('notes:list')
+
+    def listed_slugs(self):
+        response = self.client.get(self.list_url)
+        return {note.slug for note in response.context['object_list']}
+
+    def test_list_reads_replica(self):
+        """Тест, список не видит заметок, которых ещё нет в реплике."""
+        Note.objects.create(
+            title='После копии', text='Текст', slug='fresh',
+            author=self.author
+        )
+        self.assertEqual(self.listed_slugs(), {self.synced.slug})
+
+    def test_post_pins_to_primary(self):
+        """Тест, после POST автор читает из основной базы, пока жив cookie."""
+        response = self.client.post(reverse('notes:add'), data={
+            'title': 'Новая', 'text': 'Текст', 'slug': 'new'
+        })
+        self.assertEqual(response.status_code, HTTPStatus.FOUND)
+        self.assertIn(PIN_COOKIE, response.cookies)
+        self.assertEqual(self.listed_slugs(), {self.synced.slug, 'new'})
+        del self.client.cookies[PIN_COOKIE]
+        self.assertEqual(self.listed_slugs(), {self.synced.slug})
+
+    def test_middleware_modes(self):
+        """Тест, middleware отключается без READ_REPLICA, под ASGI — async."""
+        with override_settings(READ_REPLICA=False):
+            with self.assertRaises(MiddlewareNotUsed):
+                ReplicaMiddleware(HttpResponse)
+        selected = []
+
+        async def get_response(request):
+            await middleware.process_view(request, NotesList.as_view(), (), {})
+            selected.append(read_database.get())
+            return HttpResponse()
+
+        middleware = ReplicaMiddleware(get_response)
+        self.assertTrue(asyncio.iscoroutinefunction(middleware))
+        async_to_sync(middleware)(RequestFactory().get('/'))
+        self.assertEqual(selected, ['replica'])
+        self.assertIsNone(read_database.get())
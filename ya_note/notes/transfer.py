@@ -0,0 +1,80 @@
+"""Потоковое чтение и запись записей в форматах JSON Lines и CSV."""
+import csv
+import json
+import sys
+from contextlib import contextmanager
+from itertools import islice
+
+FORMATS = ('jsonl', 'csv')
+
+
+def detect_format(path, fmt=None):
+    """Формат из аргумента или из расширения файла, по умолчанию jsonl."""
+    if fmt:
+        return fmt
+    return 'csv' if str(path).lower().endswith('.csv') else 'jsonl'
+
+
+@contextmanager
+def open_stream(path, mode):
+    """Файл по пути или stdin/stdout, если путь равен '-'."""
+    if path == '-':
+        yield sys.stdin if 'r' in mode else sys.stdout
+        return
+    with open(path, mode, encoding='utf-8', newline='') as file:
+        yield file
+
+
+def read_records(file, fmt):
+    """Построчно читает записи, не загружая файл в память целиком."""
+    if fmt == 'csv':
+        yield from csv.DictReader(file)
+        return
+    for line in file:
+        if line.strip():
+            yield json.loads(line)
+
+
+def format_records(fields, rows, fmt, header=True):
+    """
+    Превращает кортежи значений в строки файла по одной за раз.
+
+    header=False пропускает заголовок CSV, когда файл пишется порциями.
+    """
+    if fmt == 'csv':
+        buffer = _LineBuffer()
+        writer = csv.writer(buffer)
+        if header:
+            yield writer.writerow(fields)
+        for row in rows:
+            yield writer.writerow(row)
+        return
+    for row in rows:
+        yield json.dumps(
+            dict(zip(fields, row)), ensure_ascii=False, default=str
+        ) + '\n'
+
+
+def write_records(file, fields, rows, fmt):
+    """Построчно пишет записи в файл и возвращает их число."""
+    count = -1 if fmt == 'csv' else 0
+    for line in format_records(fields, rows, fmt):
+        file.write(line)
+        count += 1
+    return count
+
+
+class _LineBuffer:
+    """Псевдофайл для csv.writer: writerow возвращает записанную строку."""
+
+    def write(self, line):
+        return line
+
+
+def batched(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
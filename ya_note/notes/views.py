@@ -1,9 +1,22 @@
+from django.conf import settings
 from django.contrib.auth.mixins import LoginRequiredMixin
+from django.db import IntegrityError, transaction
+from django.core.handlers.asgi import ASGIRequest
+from django.http import Http404, StreamingHttpResponse
 from django.urls import reverse_lazy
+from django.utils.functional import cached_property
 from django.views import generic
 
-from .forms import NoteForm
+from yanote.asynchronous import (
+    AsyncStreamingHttpResponse,
+    database_sync_to_async,
+)
+from yanote.conditional import ConditionalGetMixin
+
+from .forms import WARNING, NoteForm
 from .models import Note
+from .search import SearchResults
+from .transfer import format_records
 
 
 class Home(generic.TemplateView):
@@ -25,6 +38,15 @@ class NoteBase(LoginRequiredMixin):
         """Пользователь может работать только со своими заметками."""
         return self.model.objects.filter(author=self.request.user)
 
+    def form_valid(self, form):
+        """Slug, занятый параллельным запросом, показываем как ошибку."""
+        try:
+            with transaction.atomic():
+                return super().form_valid(form)
+        except IntegrityError:
+            form.add_error('slug', form.cleaned_data['slug'] + WARNING)
+            return self.form_invalid(form)
+
 
 class NoteCreate(NoteBase, generic.CreateView):
     """Добавление заметки."""
@@ -32,9 +54,7 @@ class NoteCreate(NoteBase, generic.CreateView):
     form_class = NoteForm
 
     def form_valid(self, form):
-        new_note = form.save(commit=False)
-        new_note.author = self.request.user
-        new_note.save()
+        form.instance.author = self.request.user
         return super().form_valid(form)
 
 
@@ -52,8 +72,132 @@ class NoteDelete(NoteBase, generic.DeleteView):
 class NotesList(NoteBase, generic.ListView):
     """Список всех заметок пользователя."""
     template_name = 'notes/list.html'
+    replica_reads = True
 
+    def get_queryset(self):
+        """
+        Одна страница заметок только с нужными шаблону полями.
+
+        Страницы идут по id: вместо OFFSET выбираются заметки
+        с id больше последнего показанного, и лишняя строка
+        подсказывает, есть ли следующая страница.
+        """
+        queryset = super().get_queryset().only(
+            'id', 'slug', 'title'
+        ).order_by('id')
+        after = self.request.GET.get('after')
+        if after:
+            try:
+                queryset = queryset.filter(id__gt=int(after))
+            except ValueError:
+                raise Http404('Некорректный курсор списка заметок.')
+        return queryset[:settings.NOTES_PER_PAGE + 1]
+
+    def get_context_data(self, **kwargs):
+        notes = list(self.object_list)
+        per_page = settings.NOTES_PER_PAGE
+        context = super().get_context_data(
+            object_list=notes[:per_page], **kwargs
+        )
+        context['next_cursor'] = (
+            notes[per_page - 1].pk if len(notes) > per_page else None
+        )
+        return context
+
+
+class NoteSearch(NoteBase, generic.ListView):
+    """Полнотекстовый поиск по заметкам пользователя."""
+    template_name = 'notes/search.html'
+
+    def get_paginate_by(self, queryset):
+        return settings.SEARCH_RESULTS_PER_PAGE
 
-class NoteDetail(NoteBase, generic.DetailView):
+    def get_queryset(self):
+        return SearchResults(self.request.GET.get('q', ''), self.request.user)
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['query'] = self.request.GET.get('q', '')
+        return context
+
+
+class NoteExport(NoteBase, generic.View):
+    """
+    Выгрузка всех заметок пользователя файлом CSV или NDJSON.
+
+    Заметки читаются из БД порциями и сразу отдаются клиенту,
+    поэтому память не зависит от размера блокнота. Под ASGI
+    цикл событий не может ходить в базу, и ответ отдаётся асинхронным
+    итератором: каждая порция читается в пуле потоков.
+    """
+    FIELDS = ('title', 'text', 'slug')
+    FORMATS = {
+        'csv': ('csv', 'text/csv'),
+        'ndjson': ('jsonl', 'application/x-ndjson'),
+    }
+
+    def get(self, request, *args, **kwargs):
+        export_format = request.GET.get('format', 'csv')
+        if export_format not in self.FORMATS:
+            raise Http404('Неизвестный формат выгрузки.')
+        fmt, content_type = self.FORMATS[export_format]
+        queryset = self.get_queryset().order_by('id')
+        if isinstance(request, ASGIRequest):
+            response = AsyncStreamingHttpResponse(
+                self.aiter_lines(queryset, fmt),
+                content_type=f'{content_type}; charset=utf-8'
+            )
+        else:
+            rows = queryset.values_list(*self.FIELDS).iterator(
+                chunk_size=settings.NOTES_EXPORT_CHUNK_SIZE
+            )
+            response = StreamingHttpResponse(
+                format_records(self.FIELDS, rows, fmt),
+                content_type=f'{content_type}; charset=utf-8'
+            )
+        response['Content-Disposition'] = (
+            f'attachment; filename="notes.{export_format}"'
+        )
+        return response
+
+    def read_chunk(self, queryset, fmt, after):
+        """Порция строк файла после заметки after и id последней в ней."""
+        rows = list(queryset.filter(id__gt=after).values_list(
+            'id', *self.FIELDS
+        )[:settings.NOTES_EXPORT_CHUNK_SIZE])
+        if not rows:
+            return None, ''
+        lines = format_records(
+            self.FIELDS, (row[1:] for row in rows), fmt, header=False
+        )
+        return rows[-1][0], ''.join(lines)
+
+    async def aiter_lines(self, queryset, fmt):
+        # Порции выбираются по id, а не одним курсором: соседние
+        # порции могут читаться разными потоками пула.
+        header = ''.join(format_records(self.FIELDS, (), fmt))
+        if header:
+            yield header
+        read_chunk = database_sync_to_async(self.read_chunk)
+        after = 0
+        while True:
+            after, text = await read_chunk(queryset, fmt, after)
+            if after is None:
+                return
+            yield text
+
+
+class NoteDetail(ConditionalGetMixin, NoteBase, generic.DetailView):
     """Заметка подробно."""
     template_name = 'notes/detail.html'
+
+    @cached_property
+    def note(self):
+        return super().get_object()
+
+    def get_object(self, queryset=None):
+        return self.note
+
+    def get_version(self):
+        """Версия страницы — время последнего изменения заметки."""
+        return self.note.pk, self.note.updated
@@ -9,8 +9,13 @@ https://docs.djangoproject.com/en/3.2/howto/deployment/asgi/
 
 import os
 
-from django.core.asgi import get_asgi_application
+import django
+
+from yanote.asynchronous import StreamingASGIHandler
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yanote.settings')
 
-application = get_asgi_application()
+django.setup(set_prefix=False)
+
+# Как get_asgi_application(), но с асинхронными потоковыми ответами.
+application = StreamingASGIHandler()
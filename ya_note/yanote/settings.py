@@ -1,3 +1,4 @@
+import os
 from pathlib import Path
 
 from django.urls import reverse_lazy
@@ -22,23 +23,37 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'yanote.middleware.QueryBudgetMiddleware',
+    'yanote.middleware.TemplateProfilerMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'yanote.replica.ReplicaMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
-    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'yanote.auth.CachedAuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
 ROOT_URLCONF = 'yanote.urls'
 
+TEMPLATE_LOADERS = [
+    'django.template.loaders.filesystem.Loader',
+    'django.template.loaders.app_directories.Loader',
+]
+# Скомпилированные шаблоны хранятся в памяти процесса. При DEBUG
+# runserver сбрасывает этот кэш, когда файл шаблона меняется.
+if os.getenv('CACHED_TEMPLATES', '1') == '1':
+    TEMPLATE_LOADERS = [
+        ('django.template.loaders.cached.Loader', TEMPLATE_LOADERS),
+    ]
+
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
         'DIRS': [BASE_DIR / 'templates'],
-        'APP_DIRS': True,
         'OPTIONS': {
+            'loaders': TEMPLATE_LOADERS,
             'context_processors': [
                 'django.template.context_processors.debug',
                 'django.template.context_processors.request',
@@ -52,13 +67,78 @@ TEMPLATES = [
 WSGI_APPLICATION = 'yanote.wsgi.application'
 
 
+# Настройки SQLite для конкурентной записи, см. yanote.sqlite_backend.
+# Значения можно переопределить переменными окружения SQLITE_*.
+SQLITE_PRAGMAS = {
+    'journal_mode': os.getenv('SQLITE_JOURNAL_MODE', 'WAL'),
+    'synchronous': os.getenv('SQLITE_SYNCHRONOUS', 'NORMAL'),
+    'busy_timeout': int(os.getenv('SQLITE_BUSY_TIMEOUT', 5000)),
+    'mmap_size': int(os.getenv('SQLITE_MMAP_SIZE', 64 * 1024 * 1024)),
+    # Отрицательное значение задаёт размер кэша в КиБ.
+    'cache_size': int(os.getenv('SQLITE_CACHE_SIZE', -16000)),
+}
+
+# Без TEST_SQLITE_NAME тестовые базы в памяти. ':memory:' указан явно:
+# pytest-django не знает движок проекта и иначе строит для воркеров xdist
+# имя вида test_/путь/к/db.sqlite3_gw0, которое SQLite не открывает.
+TEST_SQLITE_NAME = os.getenv('TEST_SQLITE_NAME')
+
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        'ENGINE': 'yanote.sqlite_backend',
+        'NAME': os.getenv('SQLITE_NAME', BASE_DIR / 'db.sqlite3'),
+        'PRAGMAS': SQLITE_PRAGMAS,
+        'TRANSACTION_MODE': os.getenv('SQLITE_TRANSACTION_MODE', 'IMMEDIATE'),
+        # Постоянные соединения: секунды жизни, 0 — закрывать после запроса.
+        'CONN_MAX_AGE': int(os.getenv('CONN_MAX_AGE', 60)),
+        'CONN_HEALTH_CHECKS': os.getenv('CONN_HEALTH_CHECKS', '1') == '1',
+        # Пул нужен серверам, которые создают поток на каждый запрос.
+        'POOL_SIZE': int(os.getenv('DB_POOL_SIZE', 0)),
+        # Тестовая база в файле, а не в памяти, чтобы pytest --reuse-db
+        # не накатывал миграции заново; воркеры xdist добавят суффикс.
+        'TEST': {'NAME': TEST_SQLITE_NAME or ':memory:'},
+    }
+}
+# Копия основной базы для чтения, её обновляет manage.py sync_replica.
+DATABASES['replica'] = {
+    **DATABASES['default'],
+    'NAME': os.getenv('SQLITE_REPLICA_NAME', BASE_DIR / 'db.replica.sqlite3'),
+    # Читатели не должны держать блокировку, которую ждёт копирование.
+    'TRANSACTION_MODE': 'DEFERRED',
+    'TEST': {
+        'NAME': (
+            f'{TEST_SQLITE_NAME}_replica' if TEST_SQLITE_NAME else ':memory:'
+        ),
+    },
+}
+DATABASE_ROUTERS = ['yanote.replica.ReplicaRouter']
+# Страницы чтения берут данные из реплики, см. yanote.replica.
+READ_REPLICA = bool(os.getenv('READ_REPLICA'))
+REPLICA_DATABASE = 'replica'
+REPLICA_APPS = ('notes',)
+# Сколько секунд после записи посетитель читает из основной базы.
+REPLICA_PIN_SECONDS = int(os.getenv('REPLICA_PIN_SECONDS', 10))
+
+
+# LocMemCache годится для одного процесса. С несколькими воркерами нужен
+# общий кэш: в нём сессии и пользователи, см. yanote.auth.
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv(
+            'CACHE_BACKEND',
+            'django.core.cache.backends.locmem.LocMemCache'
+        ),
+        'LOCATION': os.getenv('CACHE_LOCATION', ''),
     }
 }
 
+# Сессии сначала читаются из кэша; без обращений к БД вовсе —
+# SESSION_ENGINE=django.contrib.sessions.backends.signed_cookies.
+SESSION_ENGINE = os.getenv(
+    'SESSION_ENGINE', 'django.contrib.sessions.backends.cached_db'
+)
+# Сколько секунд пользователь сессии живёт в кэше, см. yanote.auth.
+AUTH_USER_CACHE_TIMEOUT = int(os.getenv('AUTH_USER_CACHE_TIMEOUT', 60))
 
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -87,3 +167,49 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 LOGIN_URL = reverse_lazy('users:login')
 LOGIN_REDIRECT_URL = reverse_lazy('notes:home')
+
+NOTES_PER_PAGE = 50
+
+NOTES_EXPORT_CHUNK_SIZE = 2000
+
+SEARCH_RESULTS_PER_PAGE = 20
+
+# Под ASGI отдавать страницы чтения асинхронными представлениями,
+# см. yanote.asynchronous.
+ASYNC_VIEWS = bool(os.getenv('ASYNC_VIEWS'))
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'yanote': {
+            'handlers': ['console'],
+            'level': 'INFO',
+        },
+    },
+}
+
+# Учёт SQL-запросов по представлениям, см. yanote.middleware.
+QUERY_PROFILING = bool(os.getenv('QUERY_PROFILING'))
+QUERY_PROFILING_LOG_INTERVAL = 60
+TEMPLATE_PROFILING = bool(os.getenv('TEMPLATE_PROFILING'))
+QUERY_BUDGET_RAISE = DEBUG
+# Бюджеты с запасом на сессию и пользователя, пока их нет в кэше.
+# В тестах бюджеты включены всегда, см. notes/tests/test_fixtures.py.
+QUERY_BUDGETS = {
+    'notes:home': 2,
+    'notes:list': 3,
+    'notes:search': 5,
+    'notes:export': 3,
+    'notes:detail': 3,
+    # Подбор slug: выборка занятых вариантов и точка сохранения.
+    'notes:add': 7,
+    'notes:edit': 7,
+    'notes:delete': 4,
+    'notes:success': 2,
+}